@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Offline recall/latency benchmark for the vector storage profiles.
+
+Copies the vectors of default_topics_with_vectors into one temporary
+collection per profile (see vector_profiles.py), runs a sample of queries
+against each, and compares the results with exact nearest neighbours
+computed in NumPy. Reports recall@k, p50/p95 latency and the estimated RAM
+taken by in-memory vectors, so the memory saving can be weighed against the
+search-quality cost before a profile is rolled out.
+
+Usage:
+    python benchmark_vector_profiles.py --queries 200 --k 10
+    python benchmark_vector_profiles.py --profiles memory scalar --keep
+"""
+
+import argparse
+import time
+
+import numpy as np
+from qdrant_client import models
+
+from topic_vectors import COLLECTION_WITH_VECTORS, connect_to_qdrant, load_vectors
+from vector_profiles import STORAGE_PROFILES, create_collection_with_profile, estimated_ram_bytes, search_params
+
+
+def exact_neighbours(matrix: np.ndarray, query_rows: np.ndarray, k: int) -> np.ndarray:
+    """Ground-truth top-k row indices for each query (the query row included)."""
+    similarities = matrix[query_rows] @ matrix.T
+    candidates = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+    return candidates
+
+
+def wait_until_indexed(client, collection_name: str, timeout: float = 600.0):
+    """Block until the optimizer has finished building indexes."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        info = client.get_collection(collection_name)
+        if info.status == models.CollectionStatus.GREEN:
+            return
+        time.sleep(1.0)
+    print(f"  Warning: {collection_name} still optimizing after {timeout:.0f}s")
+
+
+def load_profile_collection(client, collection_name, profile, ids, matrix, batch_size):
+    """Create a temporary collection for ``profile`` and upload all vectors."""
+    if client.collection_exists(collection_name):
+        client.delete_collection(collection_name)
+    create_collection_with_profile(
+        client,
+        collection_name,
+        size=matrix.shape[1],
+        profile=profile,
+        # Build the HNSW graph even for small benchmark collections
+        optimizers_config=models.OptimizersConfigDiff(indexing_threshold=1)
+    )
+    client.upload_collection(
+        collection_name=collection_name,
+        vectors=matrix,
+        ids=ids,
+        batch_size=batch_size,
+        wait=True
+    )
+    wait_until_indexed(client, collection_name)
+
+
+def run_queries(client, collection_name, matrix, query_rows, k, params):
+    """Run every query and return (result ids per query, latencies in ms)."""
+    results = []
+    latencies = []
+    for row in query_rows:
+        start = time.perf_counter()
+        response = client.query_points(
+            collection_name=collection_name,
+            query=matrix[row].tolist(),
+            limit=k,
+            search_params=params,
+            with_payload=False
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append([point.id for point in response.points])
+    return results, np.array(latencies)
+
+
+def recall_at_k(results, truth_ids) -> float:
+    hits = sum(len(set(found) & set(expected)) for found, expected in zip(results, truth_ids))
+    return hits / sum(len(expected) for expected in truth_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vector storage profiles against exact search")
+    parser.add_argument('--collection', default=COLLECTION_WITH_VECTORS, help="Collection to copy vectors from")
+    parser.add_argument('--profiles', nargs='+', choices=sorted(STORAGE_PROFILES), default=sorted(STORAGE_PROFILES))
+    parser.add_argument('--queries', type=int, default=200, help="Number of sampled queries (default: 200)")
+    parser.add_argument('--k', type=int, default=10, help="Neighbours per query (default: 10)")
+    parser.add_argument('--batch-size', type=int, default=256, help="Upload batch size (default: 256)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--keep', action='store_true', help="Keep the temporary collections")
+    args = parser.parse_args()
+
+    print("Connecting to Qdrant...")
+    client = connect_to_qdrant()
+    ids, _, matrix = load_vectors(client, args.collection)
+    if len(ids) <= args.k:
+        print("Not enough vectors to benchmark")
+        return
+
+    rng = np.random.default_rng(args.seed)
+    query_rows = rng.choice(len(ids), size=min(args.queries, len(ids)), replace=False)
+    truth_ids = [[ids[i] for i in row] for row in exact_neighbours(matrix, query_rows, args.k)]
+
+    report = []
+    for profile in args.profiles:
+        collection_name = f"{args.collection}__bench_{profile}"
+        print(f"\nProfile '{profile}': loading {len(ids)} vectors into {collection_name}...")
+        start = time.time()
+        load_profile_collection(client, collection_name, profile, ids, matrix, args.batch_size)
+        print(f"  Loaded and indexed in {time.time() - start:.1f}s")
+
+        results, latencies = run_queries(client, collection_name, matrix, query_rows, args.k, search_params(profile))
+        row = {
+            'profile': profile,
+            'recall': recall_at_k(results, truth_ids),
+            'p50': float(np.percentile(latencies, 50)),
+            'p95': float(np.percentile(latencies, 95)),
+            'ram_mb': estimated_ram_bytes(profile, len(ids), matrix.shape[1]) / 1_000_000,
+        }
+
+        if profile == args.profiles[0]:
+            # Exact (brute-force) search on the same data, for a latency
+            # baseline; quantization is ignored so it scores the original
+            # float32 vectors whichever profile this collection uses
+            exact_results, exact_latencies = run_queries(
+                client, collection_name, matrix, query_rows, args.k,
+                models.SearchParams(exact=True, quantization=models.QuantizationSearchParams(ignore=True))
+            )
+            report.append({
+                'profile': 'exact',
+                'recall': recall_at_k(exact_results, truth_ids),
+                'p50': float(np.percentile(exact_latencies, 50)),
+                'p95': float(np.percentile(exact_latencies, 95)),
+                'ram_mb': estimated_ram_bytes('memory', len(ids), matrix.shape[1]) / 1_000_000,
+            })
+        report.append(row)
+
+        if not args.keep:
+            client.delete_collection(collection_name)
+
+    print(f"\nResults ({len(query_rows)} queries, k={args.k}, {len(ids)} vectors of dim {matrix.shape[1]}):")
+    print(f"  {'profile':<8} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8} {'vector RAM MB':>14}")
+    for row in report:
+        print(f"  {row['profile']:<8} {row['recall']:9.3f} {row['p50']:8.2f} {row['p95']:8.2f} {row['ram_mb']:14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Near-duplicate comment filter for the timeline pipeline.
+
+Cross-posted, edited-and-reposted and copy-pasted comments would otherwise
+be parsed by spaCy and scanned by the temporal patterns once per copy. Each
+comment gets a MinHash signature over its word shingles; LSH banding turns
+the signatures into candidate pairs, and a candidate whose estimated Jaccard
+similarity reaches the threshold is dropped in favour of the first copy
+seen. Every dropped comment id is mapped to the id of the copy that was kept.
+
+With ``scope='user'`` each user is deduplicated on their own, and since a
+user's comments arrive oldest first the oldest copy is kept. With
+``scope='corpus'`` the index is shared, so a comment another user already
+posted is dropped too; users are visited in processing order (by comment
+count), so the copy kept is the one from the first user visited, which
+is not necessarily the oldest.
+"""
+
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+WORD_RE = re.compile(r'\w+')
+
+# Multiply-shift hashing: ((a * x + b) mod 2**64) >> 32 with odd ``a``
+HASH_SHIFT = np.uint64(32)
+
+
+def choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    Pick (bands, rows) with bands * rows == num_perm whose LSH threshold,
+    (1 / bands) ** (1 / rows), is closest to ``threshold``.
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class NearDuplicateFilter:
+    """MinHash signatures plus an LSH index of the comments kept so far."""
+
+    def __init__(self, threshold: float = 0.8, num_perm: int = 128, shingle_size: int = 3,
+                 scope: str = 'user', seed: int = 1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.scope = scope
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = {}
+        self._signatures: List[np.ndarray] = []
+        self._ids: List[str] = []
+
+        # dropped comment id -> id of the copy that was kept
+        self.duplicates: Dict[str, str] = {}
+        self.comments_seen = 0
+
+    def shingles(self, text: str) -> np.ndarray:
+        """Hashed word n-grams of ``text``; short texts become a single shingle."""
+        words = WORD_RE.findall(text.lower())
+        if len(words) < self.shingle_size:
+            grams = {' '.join(words)}
+        else:
+            grams = {' '.join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+        return np.fromiter((zlib.crc32(gram.encode('utf-8')) for gram in grams), dtype=np.uint64, count=len(grams))
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature: the minimum of each hash function over the shingles."""
+        shingles = self.shingles(text)
+        hashes = (self._a[:, None] * shingles[None, :] + self._b[:, None]) >> HASH_SHIFT
+        # The shifted hashes fit in 32 bits, which halves the index's memory
+        return hashes.min(axis=1).astype(np.uint32)
+
+    def _find_duplicate(self, signature: np.ndarray) -> Optional[int]:
+        """Index of a kept comment whose estimated similarity reaches the threshold."""
+        checked = set()
+        for band in range(self.bands):
+            key = (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for candidate in self._buckets.get(key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                if np.mean(self._signatures[candidate] == signature) >= self.threshold:
+                    return candidate
+        return None
+
+    def _add(self, comment_id: str, signature: np.ndarray):
+        index = len(self._signatures)
+        self._signatures.append(signature)
+        self._ids.append(comment_id)
+        for band in range(self.bands):
+            key = (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            self._buckets.setdefault(key, []).append(index)
+
+    def reset(self):
+        """Forget the kept comments (the duplicate mapping is kept)."""
+        self._buckets = {}
+        self._signatures = []
+        self._ids = []
+
+    def filter(self, comments: List[Dict[str, any]]) -> List[Dict[str, any]]:
+        """
+        Return ``comments`` (dicts with id and text, oldest first) without
+        near-duplicates, recording each dropped id in ``duplicates``.
+        """
+        if self.scope == 'user':
+            self.reset()
+
+        kept = []
+        for comment in comments:
+            self.comments_seen += 1
+            text = comment.get('text') or ''
+            signature = self.signature(text)
+            duplicate_of = self._find_duplicate(signature)
+            if duplicate_of is None:
+                self._add(comment['id'], signature)
+                kept.append(comment)
+            else:
+                self.duplicates[comment['id']] = self._ids[duplicate_of]
+        return kept
@@ -0,0 +1,451 @@
+"""
+Comment sources for the timeline pipeline.
+
+A comment source hands the pipeline rows from ``detrans_comments`` (uuid,
+username, text, created). The live database is one implementation; SQLite,
+JSONL and Parquet exports of the same table let the pipeline run offline.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional
+
+# pandas is imported where it is used so that opening a source (and the
+# CLI that does it) stays cheap
+if TYPE_CHECKING:
+    import pandas as pd
+
+COMMENT_COLUMNS = ['uuid', 'username', 'text', 'created']
+COMMENT_SEPARATOR = ' | '
+
+# hash(username) mod N, computed identically in SQL and Python so that every
+# source assigns a user to the same partition
+PARTITION_HASH_SQL = "('x' || substr(md5(username), 1, 8))::bit(32)::bigint"
+
+
+def user_partition(username: str, partitions: int) -> int:
+    """Partition index for ``username``, matching PARTITION_HASH_SQL."""
+    digest = hashlib.md5(username.encode('utf-8')).hexdigest()
+    return int(digest[:8], 16) % partitions
+
+
+class CommentSource:
+    """Base class for anything that can supply detrans_comments rows."""
+
+    name = 'base'
+
+    def __init__(self):
+        self._users_cache = None
+        self._users_lock = threading.Lock()
+
+    def iter_comments(self) -> Iterator[Dict[str, any]]:
+        """Yield every comment as a dict with COMMENT_COLUMNS keys."""
+        raise NotImplementedError
+
+    def load_comments(self) -> pd.DataFrame:
+        """Load all comments into a DataFrame, dropping rows without a username."""
+        import pandas as pd
+        df = pd.DataFrame(list(self.iter_comments()), columns=COMMENT_COLUMNS)
+        return df[df['username'].notna()]
+
+    def get_user_comments(self, username: str) -> Optional[str]:
+        """Get all comments for a specific user concatenated together, oldest first."""
+        df = self.load_comments()
+        user_df = df[df['username'] == username].sort_values('created', kind='stable')
+        if user_df.empty:
+            return None
+        return COMMENT_SEPARATOR.join(user_df['text'].astype(str))
+
+    def get_users_by_comment_count(self, limit: Optional[int] = None) -> pd.DataFrame:
+        """Get users ranked by comment count with all their comments concatenated."""
+        import pandas as pd
+        df = self.load_comments()
+        if df.empty:
+            return pd.DataFrame(columns=['username', 'comment_count', 'all_comments'])
+
+        df = df.sort_values('created', kind='stable')
+        grouped = df.groupby('username', sort=False)['text'].agg(
+            comment_count='count',
+            all_comments=lambda texts: COMMENT_SEPARATOR.join(texts.astype(str)),
+        ).reset_index()
+        grouped = grouped.sort_values('comment_count', ascending=False, kind='stable')
+
+        if limit:
+            grouped = grouped.head(limit)
+        return grouped.reset_index(drop=True)
+
+    def iter_user_partition(self, partition: int, partitions: int) -> Iterator[Dict[str, any]]:
+        """
+        Yield aggregated user rows (username, comment_count, all_comments)
+        for the users that hash into ``partition`` of ``partitions``.
+        """
+        # Aggregate once and share the result between partition readers
+        with self._users_lock:
+            if self._users_cache is None:
+                self._users_cache = self.get_users_by_comment_count().to_dict('records')
+        for record in self._users_cache:
+            if user_partition(record['username'], partitions) == partition:
+                yield record
+
+    def stream_partitions(self, partitions: int, max_buffered: int = 100) -> Iterator[Dict[str, any]]:
+        """
+        Read every partition concurrently and yield user rows as they arrive.
+
+        One reader thread per partition feeds a bounded queue, so memory stays
+        flat while the readers run ahead of the consumer.
+        """
+        rows = queue.Queue(maxsize=max_buffered)
+        done = object()
+        stop = threading.Event()
+
+        def read(partition: int):
+            try:
+                for row in self.iter_user_partition(partition, partitions):
+                    if stop.is_set():
+                        return
+                    rows.put(row)
+            except Exception as e:
+                rows.put(e)
+            finally:
+                rows.put(done)
+
+        with ThreadPoolExecutor(max_workers=partitions, thread_name_prefix='partition') as executor:
+            for partition in range(partitions):
+                executor.submit(read, partition)
+
+            remaining = partitions
+            try:
+                while remaining:
+                    item = rows.get()
+                    if item is done:
+                        remaining -= 1
+                    elif isinstance(item, Exception):
+                        raise item
+                    else:
+                        yield item
+            finally:
+                # Unblock readers if the consumer stopped early
+                stop.set()
+                while remaining:
+                    if rows.get() is done:
+                        remaining -= 1
+
+    def close(self):
+        """Release any resources held by the source."""
+        pass
+
+
+class PostgresCommentSource(CommentSource):
+    """
+    Reads comments from the live detrans_comments table.
+
+    Connections come from a thread-safe pool sized by ``pool_size``, so
+    partition readers and worker threads each get their own socket instead of
+    serialising on one connection.
+    """
+
+    name = 'postgres'
+
+    def __init__(self, pool_size: int = 1):
+        from psycopg2.pool import ThreadedConnectionPool
+
+        super().__init__()
+        self.pool_size = max(1, pool_size)
+        self.pool = ThreadedConnectionPool(
+            1,
+            self.pool_size,
+            host=os.getenv('DB_HOST', 'localhost'),
+            database=os.getenv('DB_NAME'),
+            user=os.getenv('DB_USER'),
+            password=os.getenv('DB_PASSWORD'),
+            port=os.getenv('DB_PORT', 5432)
+        )
+        # ThreadedConnectionPool raises when exhausted; block instead
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection for the duration of the block."""
+        with self._slots:
+            connection = self.pool.getconn()
+            try:
+                yield connection
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                self.pool.putconn(connection)
+
+    @contextmanager
+    def _cursor(self):
+        from psycopg2.extras import RealDictCursor
+        with self.connection() as connection:
+            with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+                yield cursor
+
+    def iter_comments(self) -> Iterator[Dict[str, any]]:
+        # Named cursor so the export streams instead of materialising the table
+        with self.connection() as connection:
+            with connection.cursor(name='comment_export') as cursor:
+                cursor.itersize = 5000
+                cursor.execute("SELECT uuid, username, text, created FROM detrans_comments")
+                for row in cursor:
+                    yield dict(zip(COMMENT_COLUMNS, row))
+
+    def iter_user_partition(self, partition: int, partitions: int) -> Iterator[Dict[str, any]]:
+        query = f"""
+        SELECT
+            username,
+            COUNT(*) as comment_count,
+            STRING_AGG(text, ' | ' ORDER BY created) as all_comments
+        FROM detrans_comments
+        WHERE username IS NOT NULL
+          AND {PARTITION_HASH_SQL} %% %s = %s
+        GROUP BY username
+        """
+        with self.connection() as connection:
+            # Server-side cursor: each partition streams its own slice
+            with connection.cursor(name=f'user_partition_{partition}') as cursor:
+                cursor.itersize = 200
+                cursor.execute(query, (partitions, partition))
+                for username, comment_count, all_comments in cursor:
+                    yield {
+                        'username': username,
+                        'comment_count': comment_count,
+                        'all_comments': all_comments,
+                    }
+
+    def get_user_comments(self, username: str) -> Optional[str]:
+        query = """
+        SELECT
+            username,
+            COUNT(*) as comment_count,
+            STRING_AGG(text, ' | ' ORDER BY created) as all_comments
+        FROM detrans_comments
+        WHERE username = %s
+        GROUP BY username
+        """
+        with self._cursor() as cursor:
+            cursor.execute(query, (username,))
+            result = cursor.fetchone()
+        return result['all_comments'] if result else None
+
+    def get_users_by_comment_count(self, limit: Optional[int] = None) -> pd.DataFrame:
+        import pandas as pd
+
+        query = """
+        SELECT
+            username,
+            COUNT(*) as comment_count,
+            STRING_AGG(text, ' | ' ORDER BY created) as all_comments
+        FROM detrans_comments
+        WHERE username IS NOT NULL
+        GROUP BY username
+        ORDER BY comment_count DESC
+        """
+        params = ()
+        if limit:
+            query += " LIMIT %s"
+            params = (limit,)
+
+        with self._cursor() as cursor:
+            cursor.execute(query, params)
+            results = cursor.fetchall()
+        return pd.DataFrame(results)
+
+    def close(self):
+        if self.pool:
+            self.pool.closeall()
+            self.pool = None
+
+
+class SQLiteCommentSource(CommentSource):
+    """Reads comments from a SQLite file containing a detrans_comments table."""
+
+    name = 'sqlite'
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self.db_connection = sqlite3.connect(path, check_same_thread=False)
+
+    def iter_comments(self) -> Iterator[Dict[str, any]]:
+        cursor = self.db_connection.execute(
+            "SELECT uuid, username, text, created FROM detrans_comments"
+        )
+        for row in cursor:
+            yield dict(zip(COMMENT_COLUMNS, row))
+
+    def get_user_comments(self, username: str) -> Optional[str]:
+        # GROUP_CONCAT does not promise to follow a subquery's ORDER BY, so
+        # the texts are joined here in the order the outer query returns them
+        cursor = self.db_connection.execute(
+            "SELECT text FROM detrans_comments WHERE username = ? AND text IS NOT NULL ORDER BY created",
+            (username,)
+        )
+        texts = [row[0] for row in cursor]
+        return COMMENT_SEPARATOR.join(texts) if texts else None
+
+    def get_users_by_comment_count(self, limit: Optional[int] = None) -> pd.DataFrame:
+        import pandas as pd
+
+        # Rank in SQLite, as the Postgres source does, instead of loading the
+        # table into pandas. GROUP_CONCAT has no ORDER BY before SQLite 3.44
+        # and does not promise to follow a subquery's order, so each user's
+        # texts are read oldest first and joined here.
+        ranking = """
+        SELECT username, COUNT(*) as comment_count
+        FROM detrans_comments
+        WHERE username IS NOT NULL
+        GROUP BY username
+        ORDER BY comment_count DESC
+        """
+        params = ()
+        if limit:
+            ranking += " LIMIT ?"
+            params = (limit,)
+        ranked = self.db_connection.execute(ranking, params).fetchall()
+
+        texts: Dict[str, List[str]] = {username: [] for username, _ in ranked}
+        cursor = self.db_connection.execute(
+            f"""
+            SELECT c.username, c.text
+            FROM detrans_comments c
+            JOIN ({ranking}) r ON r.username = c.username
+            WHERE c.text IS NOT NULL
+            ORDER BY c.username, c.created
+            """,
+            params
+        )
+        for username, text in cursor:
+            texts[username].append(text)
+
+        rows = [
+            (username, comment_count, COMMENT_SEPARATOR.join(texts[username]) or None)
+            for username, comment_count in ranked
+        ]
+        return pd.DataFrame(rows, columns=['username', 'comment_count', 'all_comments'])
+
+    def close(self):
+        if self.db_connection:
+            self.db_connection.close()
+            self.db_connection = None
+
+
+class JsonlCommentSource(CommentSource):
+    """Reads comments from a JSON Lines export, one comment object per line."""
+
+    name = 'jsonl'
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._df = None
+
+    def iter_comments(self) -> Iterator[Dict[str, any]]:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                yield {column: record.get(column) for column in COMMENT_COLUMNS}
+
+    def load_comments(self) -> pd.DataFrame:
+        # The file is read once and reused for every per-user lookup
+        if self._df is None:
+            self._df = super().load_comments()
+        return self._df
+
+
+class ParquetCommentSource(CommentSource):
+    """Reads comments from a Parquet export of detrans_comments."""
+
+    name = 'parquet'
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self._df = None
+
+    def iter_comments(self) -> Iterator[Dict[str, any]]:
+        for record in self.load_comments().to_dict('records'):
+            yield record
+
+    def load_comments(self) -> pd.DataFrame:
+        if self._df is None:
+            import pandas as pd
+            df = pd.read_parquet(self.path, columns=COMMENT_COLUMNS)
+            self._df = df[df['username'].notna()]
+        return self._df
+
+
+FILE_SOURCES = {
+    '.jsonl': JsonlCommentSource,
+    '.ndjson': JsonlCommentSource,
+    '.sqlite': SQLiteCommentSource,
+    '.sqlite3': SQLiteCommentSource,
+    '.db': SQLiteCommentSource,
+    '.parquet': ParquetCommentSource,
+}
+
+
+def open_comment_source(spec: Optional[str] = None, pool_size: int = 1) -> CommentSource:
+    """
+    Open a comment source from a CLI spec.
+
+    ``None`` or ``"postgres"`` connects to the database configured in the
+    environment with a pool of ``pool_size`` connections; anything else is
+    treated as a file path and dispatched on its extension.
+    """
+    if not spec or spec == 'postgres':
+        return PostgresCommentSource(pool_size=pool_size)
+
+    extension = os.path.splitext(spec)[1].lower()
+    source_class = FILE_SOURCES.get(extension)
+    if source_class is None:
+        supported = ', '.join(sorted(FILE_SOURCES))
+        raise ValueError(f"Unsupported comment source '{spec}' (expected one of: {supported})")
+    if not os.path.exists(spec):
+        raise FileNotFoundError(f"Comment source not found: {spec}")
+    return source_class(spec)
+
+
+def export_comments(source: CommentSource, path: str) -> int:
+    """Write every comment from ``source`` to a JSONL, SQLite or Parquet file."""
+    extension = os.path.splitext(path)[1].lower()
+    source_class = FILE_SOURCES.get(extension)
+
+    if source_class is JsonlCommentSource:
+        count = 0
+        with open(path, 'w', encoding='utf-8') as f:
+            for record in source.iter_comments():
+                f.write(json.dumps(record, default=str, ensure_ascii=False) + '\n')
+                count += 1
+        return count
+
+    import pandas as pd
+    df = pd.DataFrame(list(source.iter_comments()), columns=COMMENT_COLUMNS)
+    if source_class is ParquetCommentSource:
+        df.to_parquet(path, index=False)
+    elif source_class is SQLiteCommentSource:
+        df['created'] = df['created'].astype(str)
+        with sqlite3.connect(path) as connection:
+            df.to_sql('detrans_comments', connection, if_exists='replace', index=False)
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS idx_detrans_comments_username "
+                "ON detrans_comments (username, created)"
+            )
+    else:
+        raise ValueError(f"Unsupported export format: {path}")
+    return len(df)
+
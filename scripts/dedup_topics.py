@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Find near-duplicate topics in default_topics_with_vectors and write a
+canonical-topic mapping that dump_topics_to_json.py can apply.
+
+All vectors are loaded into one float32 matrix; cosine similarity is
+computed in bounded blocks with matrix multiplies and pairs above the
+threshold are merged with union-find. Within each cluster the canonical
+topic is the non-synthetic topic with the most questions.
+
+Usage:
+    python dedup_topics.py --threshold 0.92 --output topic_canonical_map.json
+    python dump_topics_to_json.py --canonical-map topic_canonical_map.json
+"""
+
+import argparse
+import json
+import time
+
+from topic_vectors import COLLECTION_WITH_VECTORS, UnionFind, connect_to_qdrant, load_vectors, similar_pairs
+
+
+def canonical_rank(payload):
+    """Sort key: prefer real topics, then more questions, then the lower id."""
+    return (
+        bool(payload.get('is_synthetic', False)),
+        -(payload.get('question_count') or 0),
+        str(payload.get('topic_id')),
+    )
+
+
+def build_canonical_map(payloads, matrix, threshold, block_size):
+    """Cluster topics above ``threshold`` and map every duplicate to its canonical topic."""
+    union_find = UnionFind(len(payloads))
+    pair_count = 0
+    for i, j, _ in similar_pairs(matrix, threshold, block_size):
+        union_find.union(i, j)
+        pair_count += 1
+
+    mapping = {}
+    clusters = []
+    for members in union_find.groups().values():
+        if len(members) < 2:
+            continue
+        members.sort(key=lambda idx: canonical_rank(payloads[idx]))
+        canonical = payloads[members[0]]
+        duplicates = [payloads[idx] for idx in members[1:]]
+        for duplicate in duplicates:
+            mapping[str(duplicate.get('topic_id'))] = canonical.get('topic_id')
+        clusters.append({
+            'canonical': {'topic_id': canonical.get('topic_id'), 'title': canonical.get('title', '')},
+            'duplicates': [{'topic_id': d.get('topic_id'), 'title': d.get('title', '')} for d in duplicates],
+        })
+
+    clusters.sort(key=lambda cluster: len(cluster['duplicates']), reverse=True)
+    return mapping, clusters, pair_count
+
+
+def similarity_threshold(value):
+    """argparse type: a cosine similarity in (0, 1]."""
+    threshold = float(value)
+    if not 0 < threshold <= 1:
+        raise argparse.ArgumentTypeError(f"threshold must be in (0, 1], got {value}")
+    return threshold
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collapse near-duplicate topics by embedding similarity")
+    parser.add_argument('--collection', default=COLLECTION_WITH_VECTORS, help="Collection to read vectors from")
+    parser.add_argument('--threshold', type=similarity_threshold, default=0.92, help="Cosine similarity for duplicates (default: 0.92)")
+    parser.add_argument('--block-size', type=int, default=2048, help="Rows per similarity block (default: 2048)")
+    parser.add_argument('--output', default='topic_canonical_map.json', help="Where to write the mapping")
+    args = parser.parse_args()
+
+    print("Connecting to Qdrant...")
+    client = connect_to_qdrant()
+    ids, payloads, matrix = load_vectors(client, args.collection)
+    if not ids:
+        print("No vectors found")
+        return
+
+    start_time = time.time()
+    mapping, clusters, pair_count = build_canonical_map(payloads, matrix, args.threshold, args.block_size)
+    elapsed = time.time() - start_time
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'collection': args.collection,
+            'threshold': args.threshold,
+            'canonical': mapping,
+            'clusters': clusters,
+        }, f, indent=2, ensure_ascii=False)
+
+    print(f"Compared {len(ids)} topics in {elapsed:.1f}s: {pair_count} similar pairs")
+    print(f"{len(clusters)} clusters, {len(mapping)} duplicate topics mapped to a canonical topic")
+    for cluster in clusters[:10]:
+        print(f"  {cluster['canonical']['title']!r} <- {len(cluster['duplicates'])} duplicates")
+    print(f"Mapping written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@
 Script to dump topics from two Qdrant collections and create a hierarchical JSON structure.
 """
 
+import argparse
 import json
 import os
 from qdrant_client import QdrantClient
@@ -13,27 +14,52 @@ def connect_to_qdrant():
     url = os.getenv("QDRANT_URL", "http://localhost:6333")
     return QdrantClient(url=url)
 
-def fetch_collection_data(client, collection_name):
+NOT_SYNTHETIC = Filter(
+    must=[
+        FieldCondition(
+            key="is_synthetic",
+            match=MatchValue(value=False)
+        )
+    ]
+)
+
+def preflight(client, collection_name):
+    """Count the points the dump will read and warn about unindexed filter fields"""
+    # Imported here: payload_indexes pulls in numpy through topic_vectors
+    from payload_indexes import missing_indexes
+
+    unindexed = missing_indexes(client, collection_name, ['is_synthetic', 'topic_id'])
+    if unindexed:
+        print(f"  Warning: no payload index on {', '.join(unindexed)} in {collection_name}; "
+              f"run payload_indexes.py to avoid full scans")
+    expected = client.count(collection_name=collection_name, count_filter=NOT_SYNTHETIC, exact=True).count
+    print(f"  {collection_name}: {expected} non-synthetic points")
+    return expected
+
+def fetch_collection_data(client, collection_name, page_size=1000):
     """Fetch all points from a collection with is_synthetic=false"""
     try:
-        # Get all points where is_synthetic is false
-        response = client.scroll(
-            collection_name=collection_name,
-            scroll_filter=Filter(
-                must=[
-                    FieldCondition(
-                        key="is_synthetic",
-                        match=MatchValue(value=False)
-                    )
-                ]
-            ),
-            limit=10000,  # Adjust as needed
-            with_payload=True,
-            with_vectors=False
-        )
-        
-        points = response[0]  # First element is the list of points
-        return [point.payload for point in points if point.payload]
+        expected = preflight(client, collection_name)
+
+        # Page through all points where is_synthetic is false
+        payloads = []
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=collection_name,
+                scroll_filter=NOT_SYNTHETIC,
+                limit=page_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=False
+            )
+            payloads.extend(point.payload for point in points if point.payload)
+            if offset is None:
+                break
+
+        if len(payloads) != expected:
+            print(f"  Warning: fetched {len(payloads)} of {expected} points from {collection_name}")
+        return payloads
     
     except Exception as e:
         print(f"Error fetching data from {collection_name}: {e}")
@@ -54,7 +80,9 @@ def process_topics(topics_data):
                 'title': topic.get('title', ''),
                 'topic_id': topic_id,
                 'question_count': topic.get('question_count', 0),
-                'questions': questions
+                'questions': questions,
+                # Precomputed by related_topics.py
+                'related_topic_ids': topic.get('related_topic_ids', [])
             }
     
     return processed_topics
@@ -82,6 +110,44 @@ def process_categories(categories_data):
     
     return processed_categories
 
+def load_canonical_map(path):
+    """Load the duplicate -> canonical topic_id mapping written by dedup_topics.py"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)['canonical']
+
+def apply_canonical_map(topics, categories, canonical_map):
+    """Merge duplicate topics into their canonical topic and repoint category children"""
+    merged = 0
+    for topic_id in list(topics):
+        canonical_id = canonical_map.get(str(topic_id))
+        if canonical_id is None or canonical_id not in topics:
+            continue
+        duplicate = topics.pop(topic_id)
+        canonical = topics[canonical_id]
+        canonical['question_count'] += duplicate['question_count']
+        canonical['questions'].extend(q for q in duplicate['questions'] if q not in canonical['questions'])
+        merged += 1
+
+    for category in categories:
+        children_ids = []
+        for topic_id in category['children_ids']:
+            canonical_id = canonical_map.get(str(topic_id), topic_id)
+            if canonical_id not in topics:
+                canonical_id = topic_id
+            if canonical_id not in children_ids:
+                children_ids.append(canonical_id)
+        category['children_ids'] = children_ids
+
+    for topic_id, topic in topics.items():
+        related_ids = []
+        for related_id in topic['related_topic_ids']:
+            related_id = canonical_map.get(str(related_id), related_id)
+            if related_id != topic_id and related_id not in related_ids:
+                related_ids.append(related_id)
+        topic['related_topic_ids'] = related_ids
+
+    return merged
+
 def create_hierarchical_structure(topics, categories):
     """Create hierarchical JSON structure with topics as children of categories"""
     result = []
@@ -110,6 +176,10 @@ def create_hierarchical_structure(topics, categories):
 
 def main():
     """Main function to dump topics to JSON"""
+    parser = argparse.ArgumentParser(description="Dump topics from Qdrant to a hierarchical JSON file")
+    parser.add_argument('--canonical-map', help="Apply a duplicate topic mapping from dedup_topics.py")
+    args = parser.parse_args()
+
     print("Connecting to Qdrant...")
     client = connect_to_qdrant()
     
@@ -125,6 +195,10 @@ def main():
     topics = process_topics(topics_data)
     categories = process_categories(categories_data)
     
+    if args.canonical_map:
+        merged = apply_canonical_map(topics, categories, load_canonical_map(args.canonical_map))
+        print(f"Merged {merged} duplicate topics into their canonical topics")
+    
     print("Creating hierarchical structure...")
     hierarchical_data = create_hierarchical_structure(topics, categories)
     
@@ -0,0 +1,153 @@
+"""
+Embedding providers for the Python embedding scripts.
+
+    openai  text-embedding-3-* through the OpenAI API (the original backend)
+    local   a sentence-transformers model on CPU, optionally through ONNX Runtime
+
+Providers embed lists of texts in batches and report their vector dimension,
+so collections and tables can be sized from the provider in use.
+"""
+
+import os
+import random
+import time
+from typing import List, Optional
+
+OPENAI_DIMENSIONS = {
+    'text-embedding-3-small': 1536,
+    'text-embedding-3-large': 3072,
+    'text-embedding-ada-002': 1536,
+}
+
+
+class EmbeddingProvider:
+    """Base class: turns a list of texts into a list of vectors."""
+
+    name = 'base'
+    # Pause between batches, for providers with rate limits
+    throttle_seconds = 0.0
+
+    @property
+    def dimension(self) -> int:
+        raise NotImplementedError
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        raise NotImplementedError
+
+
+class OpenAIEmbeddingProvider(EmbeddingProvider):
+    """OpenAI embeddings API with exponential backoff on rate limits."""
+
+    name = 'openai'
+    throttle_seconds = 1.0
+
+    def __init__(self, model: str = 'text-embedding-3-small', max_retries: int = 5, batch_size: int = 100):
+        if model not in OPENAI_DIMENSIONS:
+            raise ValueError(
+                f"Unknown OpenAI embedding model '{model}'; supported: {', '.join(OPENAI_DIMENSIONS)}"
+            )
+        from openai import OpenAI
+
+        self.model = model
+        self.max_retries = max_retries
+        self.batch_size = batch_size
+        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    @property
+    def dimension(self) -> int:
+        return OPENAI_DIMENSIONS[self.model]
+
+    def _create(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries):
+            try:
+                response = self.client.embeddings.create(input=texts, model=self.model)
+                return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+            except Exception as e:
+                if attempt == self.max_retries - 1:
+                    raise e
+
+                # Check if it's a rate limit error
+                if "rate_limit" in str(e).lower() or "429" in str(e):
+                    # Exponential backoff with jitter for rate limits
+                    wait_time = (2 ** attempt) + random.uniform(0, 1)
+                    print(f"Rate limit hit, waiting {wait_time:.1f}s before retry {attempt + 1}/{self.max_retries}")
+                    time.sleep(wait_time)
+                else:
+                    # For other errors, shorter wait
+                    wait_time = 1 + random.uniform(0, 0.5)
+                    print(f"API error: {e}, retrying in {wait_time:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+                    time.sleep(wait_time)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        embeddings = []
+        for start in range(0, len(texts), self.batch_size):
+            embeddings.extend(self._create(texts[start:start + self.batch_size]))
+        return embeddings
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """
+    sentence-transformers model running on the local CPU.
+
+    ``encode`` sorts each call's texts by length before batching, so every
+    batch is padded only to its own longest text. ``backend='onnx'`` runs
+    the exported ONNX graph instead of PyTorch. ``threads`` caps the
+    intra-op threads of whichever runtime is used: PyTorch through
+    torch.set_num_threads, ONNX Runtime through its session options.
+    """
+
+    name = 'local'
+
+    def __init__(self, model: str = 'sentence-transformers/all-MiniLM-L6-v2', threads: Optional[int] = None,
+                 batch_size: int = 64, backend: str = 'torch', normalize: bool = True):
+        if threads:
+            # Must be set before the runtimes create their thread pools
+            os.environ['OMP_NUM_THREADS'] = str(threads)
+
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if threads:
+            torch.set_num_threads(threads)
+
+        self.model_name = model
+        self.batch_size = batch_size
+        self.normalize = normalize
+        model_kwargs = None
+        if threads and backend == 'onnx':
+            # ONNX Runtime sizes its own pool and ignores OMP_NUM_THREADS
+            import onnxruntime
+
+            session_options = onnxruntime.SessionOptions()
+            session_options.intra_op_num_threads = threads
+            model_kwargs = {'session_options': session_options}
+
+        self.model = SentenceTransformer(model, device='cpu', backend=backend, model_kwargs=model_kwargs)
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        embeddings = self.model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=self.normalize,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        return embeddings.tolist()
+
+
+PROVIDERS = {
+    'openai': OpenAIEmbeddingProvider,
+    'local': LocalEmbeddingProvider,
+}
+
+
+def get_embedding_provider(name: str = 'openai', model: Optional[str] = None, **kwargs) -> EmbeddingProvider:
+    """Create a provider by name; ``model`` falls back to the provider's default."""
+    provider_class = PROVIDERS[name]
+    if model:
+        kwargs['model'] = model
+    return provider_class(**kwargs)
@@ -1,43 +1,204 @@
 from qdrant_client import QdrantClient, models
-from openai import OpenAI
+import argparse
+import queue
+import random
+import sys
+import threading
 import time
 import os
-import random
+import numpy as np
+from embedding_providers import PROVIDERS, EmbeddingProvider, get_embedding_provider
+from vector_profiles import DEFAULT_PROFILE, STORAGE_PROFILES, apply_profile, create_collection_with_profile
 from dotenv import load_dotenv                                                                                                                                          
 load_dotenv('../.env')                                                                                                                                                           
 
 # --- Setup clients ---
-qdrant = QdrantClient("http://localhost:6333", prefer_grpc=False)
-openai = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+QDRANT_URL = "http://localhost:6333"
+qdrant = QdrantClient(QDRANT_URL, prefer_grpc=False)  # replaced in main() when --grpc is given
+# Embedding backend; chosen in main() (OpenAI by default)
+provider: EmbeddingProvider = None
 
 COLLECTION = "default_topics"
 COLLECTION_WITH_VECTORS = "default_topics_with_vectors"  # New collection for embeddings
 BATCH_SIZE = 100  # adjust depending on your resources
 
-def generate_embedding(text: str, max_retries=5):
-    """Generate a vector embedding for the given text with exponential backoff."""
-    for attempt in range(max_retries):
+def get_provider() -> EmbeddingProvider:
+    """Return the configured embedding provider, defaulting to OpenAI."""
+    global provider
+    if provider is None:
+        provider = get_embedding_provider('openai')
+    return provider
+
+def generate_embedding(text: str):
+    """Generate a vector embedding for the given text."""
+    return get_provider().embed([text])[0]
+
+def embed_points(points):
+    """
+    Embed the titles of a batch of points in one provider call.
+
+    Returns (point, embedding) pairs. If the batch call fails, points are
+    retried one by one so a single bad text only skips itself.
+    """
+    points = [pt for pt in points if pt.payload.get("title")]
+    if not points:
+        return []
+    try:
+        embeddings = get_provider().embed([pt.payload["title"] for pt in points])
+        return list(zip(points, embeddings))
+    except Exception as e:
+        print(f"Batch embedding failed ({e}), falling back to one point at a time")
+
+    embedded = []
+    for pt in points:
         try:
-            response = openai.embeddings.create(
-                input=text,
-                model="text-embedding-3-small"  # or "text-embedding-3-large"
+            embedded.append((pt, generate_embedding(pt.payload["title"])))
+        except Exception as e:
+            print(f"Error embedding point {pt.id}: {e}")
+            # Continue with other points in the batch
+    return embedded
+
+class PointUploader:
+    """
+    Upload points to Qdrant from a background thread.
+
+    The embedding loop hands points over through a bounded queue and carries
+    on embedding; the thread feeds them to ``upload_points``, which batches
+    them and can spread the batches over ``parallel`` worker processes. With
+    ``wait=False`` Qdrant acknowledges each batch before applying it.
+    """
+
+    _DONE = object()
+
+    def __init__(self, client, collection_name, batch_size=256, parallel=1, wait=True, max_buffered=10_000):
+        self._queue = queue.Queue(maxsize=max_buffered)
+        self._error = None
+        self.queued = 0
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(client, collection_name, batch_size, parallel, wait),
+            name='qdrant-upload',
+            daemon=True
+        )
+        self._thread.start()
+
+    def _points(self):
+        while True:
+            point = self._queue.get()
+            if point is self._DONE:
+                return
+            yield point
+
+    def _run(self, client, collection_name, batch_size, parallel, wait):
+        try:
+            client.upload_points(
+                collection_name=collection_name,
+                points=self._points(),
+                batch_size=batch_size,
+                parallel=parallel,
+                wait=wait,
+                max_retries=3
             )
-            return response.data[0].embedding
         except Exception as e:
-            if attempt == max_retries - 1:
-                raise e
-            
-            # Check if it's a rate limit error
-            if "rate_limit" in str(e).lower() or "429" in str(e):
-                # Exponential backoff with jitter for rate limits
-                wait_time = (2 ** attempt) + random.uniform(0, 1)
-                print(f"Rate limit hit, waiting {wait_time:.1f}s before retry {attempt + 1}/{max_retries}")
-                time.sleep(wait_time)
-            else:
-                # For other errors, shorter wait
-                wait_time = 1 + random.uniform(0, 0.5)
-                print(f"API error: {e}, retrying in {wait_time:.1f}s (attempt {attempt + 1}/{max_retries})")
-                time.sleep(wait_time)
+            self._error = e
+            # Keep draining so the embedding loop never blocks on a full queue
+            while self._queue.get() is not self._DONE:
+                pass
+
+    def put(self, points):
+        if self._error:
+            raise self._error
+        for point in points:
+            self._queue.put(point)
+            self.queued += 1
+
+    def close(self):
+        """Wait for every queued point to be sent."""
+        self._queue.put(self._DONE)
+        self._thread.join()
+        if self._error:
+            raise self._error
+
+def missing_points(point_ids, batch_size=1000):
+    """Ids of ``point_ids`` that COLLECTION_WITH_VECTORS does not hold."""
+    missing = []
+    for i in range(0, len(point_ids), batch_size):
+        batch = point_ids[i:i + batch_size]
+        found = {
+            point.id for point in qdrant.retrieve(
+                collection_name=COLLECTION_WITH_VECTORS,
+                ids=batch,
+                with_payload=False,
+                with_vectors=False
+            )
+        }
+        missing.extend(point_id for point_id in batch if point_id not in found)
+    return missing
+
+def mismatched_samples(samples):
+    """Sampled (id, title, vector) whose stored title or vector differs from what was uploaded."""
+    retrieved = {
+        point.id: point for point in qdrant.retrieve(
+            collection_name=COLLECTION_WITH_VECTORS,
+            ids=[point_id for point_id, _, _ in samples],
+            with_payload=True,
+            with_vectors=True
+        )
+    }
+    mismatched = []
+    for point_id, title, vector in samples:
+        point = retrieved.get(point_id)
+        if point is None or point.payload.get("title") != title:
+            mismatched.append(point_id)
+            continue
+        # Cosine collections store normalized vectors, so compare directions
+        expected_vector = np.asarray(vector, dtype=np.float32)
+        stored_vector = np.asarray(point.vector, dtype=np.float32)
+        similarity = float(expected_vector @ stored_vector) / (
+            np.linalg.norm(expected_vector) * np.linalg.norm(stored_vector) or 1.0
+        )
+        if similarity < 0.999:
+            mismatched.append(point_id)
+    return mismatched
+
+def verify_upload(point_ids, samples, timeout=300.0):
+    """
+    End-of-run consistency check.
+
+    Checks that every id uploaded this run is present in
+    COLLECTION_WITH_VECTORS and that the sampled points' stored vectors and
+    titles match what was uploaded. The collection count alone can't show
+    this: on a re-run the points already exist, so the count is met before
+    any write lands. Writes sent with wait=False are applied
+    asynchronously, so both checks are retried until ``timeout``.
+    """
+    deadline = time.time() + timeout
+    while True:
+        missing = missing_points(point_ids)
+        mismatched = mismatched_samples(samples) if samples else []
+        if (not missing and not mismatched) or time.time() > deadline:
+            break
+        time.sleep(1.0)
+    stored = qdrant.count(collection_name=COLLECTION_WITH_VECTORS, exact=True).count
+    source_count = qdrant.count(collection_name=COLLECTION, exact=True).count
+
+    ok = True
+    print(f"Consistency check: {COLLECTION}={source_count}, {COLLECTION_WITH_VECTORS}={stored}, uploaded this run={len(point_ids)}")
+    if missing:
+        print(f"❌ {len(missing)} uploaded points are missing from {COLLECTION_WITH_VECTORS}, e.g. {missing[:5]}")
+        ok = False
+    else:
+        print(f"✅ All {len(point_ids)} uploaded points are stored")
+        if stored < source_count:
+            print(f"⚠️  {source_count - stored} points of {COLLECTION} have no vector (e.g. no title)")
+
+    if samples:
+        if mismatched:
+            print(f"❌ {len(mismatched)}/{len(samples)} spot-checked points do not match what was uploaded")
+            ok = False
+        else:
+            print(f"✅ {len(samples)} spot-checked points match")
+    return ok
 
 def check_collection_info():
     """Check the collection configuration to understand vector setup."""
@@ -49,31 +210,57 @@ def check_collection_info():
         print(f"Error getting collection info: {e}")
         return None
 
-def create_vector_collection():
-    """Create a new collection with proper vector configuration."""
+def create_vector_collection(profile=DEFAULT_PROFILE, update_existing=False):
+    """
+    Create a new collection with proper vector configuration.
+
+    ``profile`` selects quantization, on-disk storage and HNSW settings from
+    vector_profiles.STORAGE_PROFILES. With ``update_existing`` an existing
+    collection is switched to the profile instead of being left alone.
+    """
     try:
+        size = get_provider().dimension
+
         # Check if collection already exists
         try:
-            qdrant.get_collection(COLLECTION_WITH_VECTORS)
-            print(f"Collection {COLLECTION_WITH_VECTORS} already exists")
-            return
+            existing = qdrant.get_collection(COLLECTION_WITH_VECTORS)
         except:
-            pass  # Collection doesn't exist, create it
+            existing = None  # Collection doesn't exist, create it
         
-        print(f"Creating collection {COLLECTION_WITH_VECTORS} with vector configuration...")
-        qdrant.create_collection(
-            collection_name=COLLECTION_WITH_VECTORS,
-            vectors_config=models.VectorParams(
-                size=1536,  # text-embedding-3-small dimension
-                distance=models.Distance.COSINE
-            )
+        if existing is not None:
+            existing_size = existing.config.params.vectors.size
+            if existing_size != size:
+                raise ValueError(
+                    f"{COLLECTION_WITH_VECTORS} has {existing_size}-dim vectors but the "
+                    f"{get_provider().name} provider produces {size}-dim vectors"
+                )
+            if update_existing:
+                print(f"Applying storage profile '{profile}' to existing collection {COLLECTION_WITH_VECTORS}")
+                apply_profile(qdrant, COLLECTION_WITH_VECTORS, profile)
+            else:
+                print(f"Collection {COLLECTION_WITH_VECTORS} already exists")
+            return
+        
+        print(f"Creating collection {COLLECTION_WITH_VECTORS} with storage profile '{profile}'...")
+        create_collection_with_profile(
+            qdrant,
+            COLLECTION_WITH_VECTORS,
+            size=size,  # follows the embedding provider
+            profile=profile
         )
         print(f"Successfully created collection {COLLECTION_WITH_VECTORS}")
     except Exception as e:
         print(f"Error creating collection: {e}")
         raise
 
-def update_all_points():
+def update_all_points(profile=DEFAULT_PROFILE, update_profile=False, upload_batch_size=BATCH_SIZE,
+                      upload_parallel=1, wait=True, verify=True, verify_samples=20):
+    """
+    Embed every point of COLLECTION into COLLECTION_WITH_VECTORS.
+
+    Points are uploaded by a PointUploader while the next batch is being
+    embedded. Returns False if the consistency check fails.
+    """
     # Check collection configuration first
     collection_info = check_collection_info()
     if collection_info:
@@ -81,7 +268,7 @@ def update_all_points():
         print(f"Vectors config: {vectors_config}")
     
     # Create the new collection with vectors
-    create_vector_collection()
+    create_vector_collection(profile, update_existing=update_profile)
     
     # First, get total count for progress tracking
     print("Getting total point count...")
@@ -92,6 +279,14 @@ def update_all_points():
     offset = None
     total_updated = 0
     start_time = time.time()
+    uploader = PointUploader(
+        qdrant, COLLECTION_WITH_VECTORS,
+        batch_size=upload_batch_size, parallel=upload_parallel, wait=wait
+    )
+    # Every uploaded id, and a reservoir sample of (id, title, vector) for the spot check
+    uploaded_ids = []
+    samples = []
+    rng = random.Random(42)
 
     while True:
         # Step 1: Scroll through points in batches
@@ -106,53 +301,39 @@ def update_all_points():
         if not points:
             break
 
+        # Step 2: Generate embeddings for the whole batch
         updates = []
-        for pt in points:
-            text = pt.payload.get("title")
-            if not text:
-                continue
-
-            try:
-                # Step 2: Generate embedding
-                emb = generate_embedding(text)
-
-                # Step 3: Build update structure
-                # Use unnamed vector for the new collection
-                updates.append(
-                    models.PointStruct(
-                        id=pt.id,
-                        vector=emb,  # Use unnamed vector
-                        payload=pt.payload  # keep payload unchanged
-                    )
+        for pt, emb in embed_points(points):
+            # Step 3: Build update structure
+            # Use unnamed vector for the new collection
+            updates.append(
+                models.PointStruct(
+                    id=pt.id,
+                    vector=emb,  # Use unnamed vector
+                    payload=pt.payload  # keep payload unchanged
                 )
-            except Exception as e:
-                print(f"Error embedding point {pt.id}: {e}")
-                # Continue with other points in the batch
-                continue
+            )
 
-        # Step 4: Upsert vectors to the new collection
+        # Step 4: Queue the points for upload and move on to the next batch
         if updates:
-            try:
-                qdrant.upsert(
-                    collection_name=COLLECTION_WITH_VECTORS,
-                    points=updates
-                )
-                total_updated += len(updates)
-                
-                # Calculate progress and ETA
-                progress_pct = (total_updated / total_points) * 100
-                elapsed_time = time.time() - start_time
-                if total_updated > 0:
-                    avg_time_per_point = elapsed_time / total_updated
-                    remaining_points = total_points - total_updated
-                    eta_seconds = remaining_points * avg_time_per_point
-                    eta_minutes = eta_seconds / 60
-                    print(f"Updated {len(updates)} points | Progress: {total_updated}/{total_points} ({progress_pct:.1f}%) | ETA: {eta_minutes:.1f} min")
+            uploader.put(updates)
+            for point in updates:
+                total_updated += 1
+                uploaded_ids.append(point.id)
+                if len(samples) < verify_samples:
+                    samples.append((point.id, point.payload.get("title"), point.vector))
                 else:
-                    print(f"Updated {len(updates)} points (total: {total_updated})")
-            except Exception as e:
-                print(f"Error upserting batch to Qdrant: {e}")
-                print("Continuing with next batch...")
+                    slot = rng.randrange(total_updated)
+                    if slot < verify_samples:
+                        samples[slot] = (point.id, point.payload.get("title"), point.vector)
+
+            # Calculate progress and ETA
+            progress_pct = (total_updated / total_points) * 100
+            elapsed_time = time.time() - start_time
+            avg_time_per_point = elapsed_time / total_updated
+            remaining_points = total_points - total_updated
+            eta_minutes = remaining_points * avg_time_per_point / 60
+            print(f"Queued {len(updates)} points | Progress: {total_updated}/{total_points} ({progress_pct:.1f}%) | ETA: {eta_minutes:.1f} min")
 
         # Move to next batch
         offset = next_offset
@@ -160,9 +341,68 @@ def update_all_points():
             break
 
         # Throttle between batches to be respectful to APIs
-        time.sleep(1.0)
+        if get_provider().throttle_seconds:
+            time.sleep(get_provider().throttle_seconds)
+
+    print("Waiting for queued uploads...")
+    uploader.close()
+    elapsed_time = time.time() - start_time
+    print(f"Finished. Total points updated with vectors: {total_updated} "
+          f"({total_updated / elapsed_time if elapsed_time else 0:.1f} points/s)")
+
+    if not verify:
+        return True
+    return verify_upload(uploaded_ids, samples)
+
+def main():
+    global provider, qdrant
+
+    parser = argparse.ArgumentParser(description=f"Embed {COLLECTION} titles into {COLLECTION_WITH_VECTORS}")
+    parser.add_argument('--provider', choices=sorted(PROVIDERS), default='openai',
+                        help="Embedding backend (default: openai)")
+    parser.add_argument('--model', help="Model name for the provider (default: the provider's default)")
+    parser.add_argument('--threads', type=int, help="CPU threads for the local provider")
+    parser.add_argument('--embed-batch-size', type=int, default=64, help="Inference batch size for the local provider")
+    parser.add_argument('--backend', choices=['torch', 'onnx'], default='torch', help="Runtime for the local provider")
+    parser.add_argument('--profile', choices=sorted(STORAGE_PROFILES), default=DEFAULT_PROFILE,
+                        help=f"Vector storage profile (default: {DEFAULT_PROFILE})")
+    parser.add_argument('--update-profile', action='store_true',
+                        help="Apply --profile to the collection if it already exists")
+    parser.add_argument('--grpc', action='store_true', help="Talk to Qdrant over gRPC")
+    parser.add_argument('--grpc-port', type=int, default=6334, help="Qdrant gRPC port (default: 6334)")
+    parser.add_argument('--upload-batch-size', type=int, default=BATCH_SIZE,
+                        help=f"Points per upload request (default: {BATCH_SIZE})")
+    parser.add_argument('--upload-parallel', type=int, default=1, help="Parallel upload processes (default: 1)")
+    parser.add_argument('--no-wait', action='store_true',
+                        help="Don't wait for Qdrant to apply each batch before sending the next")
+    parser.add_argument('--verify-samples', type=int, default=20,
+                        help="Points re-read and compared in the consistency check (default: 20)")
+    parser.add_argument('--skip-verify', action='store_true', help="Skip the end-of-run consistency check")
+    args = parser.parse_args()
+
+    if args.grpc:
+        qdrant = QdrantClient(QDRANT_URL, prefer_grpc=True, grpc_port=args.grpc_port)
+
+    if args.provider == 'local':
+        provider = get_embedding_provider(
+            'local', model=args.model, threads=args.threads,
+            batch_size=args.embed_batch_size, backend=args.backend
+        )
+    else:
+        provider = get_embedding_provider(args.provider, model=args.model)
+    print(f"Using {provider.name} embeddings ({provider.dimension} dimensions)")
 
-    print(f"Finished. Total points updated with vectors: {total_updated}")
+    ok = update_all_points(
+        profile=args.profile,
+        update_profile=args.update_profile,
+        upload_batch_size=args.upload_batch_size,
+        upload_parallel=args.upload_parallel,
+        wait=not args.no_wait,
+        verify=not args.skip_verify,
+        verify_samples=args.verify_samples
+    )
+    if not ok:
+        sys.exit(1)
 
 if __name__ == "__main__":
-    update_all_points()
+    main()
@@ -1,35 +1,332 @@
 import os
 import sys
-import pandas as pd
-import spacy
 import re
+import time
+import argparse
+import json
+import itertools
 from datetime import datetime
-from typing import List, Dict, Tuple, Optional
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from typing import TYPE_CHECKING, List, Dict, Tuple, Optional
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+from comment_sources import COMMENT_SEPARATOR, CommentSource, PostgresCommentSource, export_comments, open_comment_source
+from lemma_index import LemmaIndex
+from work_scheduler import WorkerStats, merge_results, plan_tasks
+
+# pandas, spaCy, psycopg2 and numpy are imported only by the code paths that
+# need them, so --help, argument validation and export start instantly
+if TYPE_CHECKING:
+    import pandas as pd
+    from comment_dedup import NearDuplicateFilter
+    from timeline_sink import RedisTimelineSink
+
+# --------------------------------------------------------------------------
+# 1. AGE-BASED MARKERS
+# --------------------------------------------------------------------------
+AGE_PATTERNS = [
+    r"\b[iI]'?m\s+(\d{1,2})\b",
+    r'\bI\s*(?:am|was|were)\s+(\d{1,2})\b',
+    r'\bat\s+(\d{1,2})\b',
+    r'\bwhen\s+I\s+was\s+(\d{1,2})\b',
+    r'\b(\d{1,2})\s*years?\s*old\b',
+    r'\b(?:turned?|turning)\s+(\d{1,2})\b',
+    r'\b(?:aged?)\s*(\d{1,2})\b',
+    r'\b(\d{1,2})\s*y\.?o\.?\b',
+    r'\b(\d{1,2})\b(?=\s*(?:yr|yrs|year|years)\b)',
+]
+
+# --------------------------------------------------------------------------
+# 2. LIFE-STAGE / EDUCATIONAL MILESTONES
+# --------------------------------------------------------------------------
+LIFE_STAGE_PATTERNS = [
+    # school / university levels
+    r'\b(freshman|sophomore|junior|senior)\s+(?:year|grade)\b',
+    r'\bgrade\s+(\d{1,2})\b',
+    r'\b(\d{1,2})(?:th|rd|nd|st)\s+grade\b',
+    r'\b(elementary|middle|high)\s+school\b',
+    r'\b(college|university|polytechnic|trade\s+school)\b',
+    r'\b(kindergarten|preschool)\b',
+    r'\b(first|second|third|fourth|fifth)\s+year\b',
+    r'\b(fall|spring|summer|winter)\s+(?:of\s+)?(?:my\s+)?(?:first|second|third|fourth)\s+year\b',
+    r'\bsemester\s+(\d+)\b',
+    r'\bgap\s+year\b',
+
+    # developmental stages
+    r'\b(puberty|teenage|adolescen[ct]|childhood|early\s+twenties|mid\s+twenties|late\s+twenties)\b',
+    r'\b(pre-?teen|prepubescent|young\s+adult|adult\s+life|maturity)\b',
+
+    # trauma and abuse markers
+    r'\b(trauma|traumatic|traumatized|traumatizing)\b',
+    r'\b(abuse|abused|abusive|abuser)\b',
+    r'\b(rape|raped|sexual\s+assault|sexually\s+assaulted)\b',
+    r'\b(molest|molested|molestation|sexual\s+abuse)\b',
+    r'\b(domestic\s+violence|physical\s+abuse|emotional\s+abuse|psychological\s+abuse)\b',
+    r'\b(bullying|bullied|harassment|harassed)\b',
+    r'\b(grooming|groomed|predator|inappropriate\s+touching)\b',
+    r'\b(ptsd|post-?traumatic\s+stress|flashbacks?|triggers?|triggered)\b',
+    r'\b(self-?harm|cutting|suicide\s+attempt|suicidal)\b',
+    r'\b(eating\s+disorder|anorexia|bulimia|body\s+dysmorphia)\b'
+]
+
+# --------------------------------------------------------------------------
+# 3. MEDICAL / TRANSITION TIMELINES
+# --------------------------------------------------------------------------
+
+# Number patterns - both written and numeric forms
+NUMBERS = r"(?:one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|thirteen|fourteen|fifteen|sixteen|seventeen|eighteen|nineteen|twenty|\d+(?:\.\d+)?)"
+
+# T and E abbreviations are matched case-sensitively; under IGNORECASE a bare
+# "t"/"e" would match stray letters ("don't", "e.g.")
+HORMONES = r"(?:HRT|hormones?|testosterone|(?-i:T)\b|test|estrogen|estradiol|(?-i:E)\b|blockers?|puberty\s+blockers|GnRH)"
+SURGERIES = r"(?:surgery|surgeries|op|operation|top\s+surgery|bottom\s+surgery|FFS|BA|GCS|GRS|vaginoplasty|mastectomy|phalloplasty|phaloplasty|hysterectomy|facial|orchi|orchiectomy)"
+TRANSITION_TERMS = r"(?:transition|trans\s+journey|was\s+out|came\s+out|coming\s+out|egg|socially|social\s+transition|medical\s+transition)"
+DURATION = fr"(?:(?:first|last|past|initial)\s+)?({NUMBERS})\s*(years?|months?|weeks?|days?)"
+
+MEDICAL_PATTERNS = [
+    # Hormone start / initiation
+    fr'\b(started|began|went\s+on|got\s+on|initiated)\s+{HORMONES}\b',
+
+    # Duration on hormones / blockers
+    fr'\b(on|started|been\s+on)\s+{HORMONES}\s+for\s+{DURATION}\b',
+    fr'\b{DURATION}\s+(?:on|into)\s+{HORMONES}\b',
+
+    # Relative timing (before/after starting)
+    fr'\b{DURATION}\s+(?:before|after)\s+(?:starting|start|started|beginning|transitioning|on|going\s+on)\s+(?:{HORMONES}|{SURGERIES}|{TRANSITION_TERMS})\b',
+    fr'\b(before|after)\s+(?:starting|beginning|going\s+on)\s+(?:{HORMONES}|{TRANSITION_TERMS})\b',
+
+    # Countdown-style “T-2 years”
+    fr'\b(?-i:[TE])[-\s]*{DURATION}\b',
+
+    # Surgery / Post-op
+    fr'\b(post|after)\s+{SURGERIES}\b',
+    fr'\b{DURATION}\s+(?:post|after|since)\s+{SURGERIES}\b',
+    fr'\bday\s+(\d+)\s+(?:post-op|after\s+surgery)\b',
+
+    # Dosage / microdosing
+    r'\b(\d+(?:\.\d+)?)\s*(mg|ml|pumps?|units?)\s*(?:daily|weekly|biweekly|monthly)\b',
+    r'\b(micro\s*dose|microdosing)\b',
+
+    # Blockers / discontinuation
+    fr'\b(on|started|began)\s+(?:puberty\s+blockers|GnRH)\b',
+    fr'\b(stopped|discontinued)\s+{HORMONES}\b',
+
+    # Transition phase keywords
+    r'\b(pre-?transition|early\s+transition|mid\s+transition|late\s+transition|post-?transition)\b',
+    fr'\b(?:(?:first|last|past|initial)\s+)?({NUMBERS})\s+days?\s+(?:on|into)\s+{HORMONES}\b',
+    fr'\b(?:(?:first|last|past|initial)\s+)?({NUMBERS})\s+months?\s+(?:on|into)\s+{HORMONES}\b',
+    fr'\b(?:(?:first|last|past|initial)\s+)?({NUMBERS})\s+years?\s+(?:on|into)\s+{HORMONES}\b',
+    fr'\b(first|second|third|fourth|fifth|sixth|seventh|eighth|ninth|tenth)\s+year\s+(?:on|into)\s+{HORMONES}\b'
+]
+
+# --------------------------------------------------------------------------
+# 4. DETRANSITION-SPECIFIC MARKERS
+# --------------------------------------------------------------------------
+DETRANSITION_PATTERNS = [
+    # Stopping/discontinuing
+    r'\b(stopped|quit|discontinued|went\s+off|got\s+off|came\s+off)\s+(?:taking\s+)?(?:HRT|hormones?|testosterone|estrogen|(?-i:T)\b|(?-i:E)\b)\b',
+    r'\b(detransition|detrans|de-transition|retransition|going\s+back)\b',
+    r'\b(regret|regretting|wish\s+I\s+hadn\'t|mistake|wrong\s+path)\b',
+
+    # Reversal processes
+    r'\b(reversal|reverse|undoing|going\s+back|returning\s+to)\b',
+    r'\b(voice\s+training|speech\s+therapy)\s+(?:to\s+)?(?:feminize|masculinize|change\s+back)\b',
+    r'\b(laser\s+hair\s+removal|electrolysis)\s+(?:to\s+remove|for\s+facial\s+hair)\b',
+
+    # Realization markers
+    r'\b(realized|figured\s+out|came\s+to\s+understand|epiphany|awakening)\s+(?:that\s+)?(?:I\s+was|this\s+was)\s+(?:wrong|a\s+mistake|not\s+right)\b',
+    r'\b(questioning|doubting|second\s+thoughts|having\s+doubts)\s+(?:my\s+)?(?:transition|identity|decision)\b',
+]
+
+# --------------------------------------------------------------------------
+# 5. MENTAL HEALTH & COMORBIDITY MARKERS
+# --------------------------------------------------------------------------
+MENTAL_HEALTH_PATTERNS = [
+    # Specific conditions often mentioned
+    r'\b(autism|autistic|ASD|asperger|neurodivergent|ADHD|ADD)\b',
+    r'\b(depression|depressed|anxiety|anxious|OCD|bipolar|BPD|borderline)\b',
+    r'\b(dissociation|dissociative|depersonalization|derealization)\b',
+    r'\b(therapy|therapist|counseling|counselor|psychologist|psychiatrist)\b',
+    r'\b(medication|antidepressant|SSRIs?|mood\s+stabilizer)\b',
+
+    # Body image issues
+    r'\b(body\s+dysmorphia|dysmorphic|body\s+image|self-image)\b',
+    r'\b(dysphoria|euphoria|gender\s+dysphoria|social\s+dysphoria|body\s+dysphoria)\b',
+]
+
+# --------------------------------------------------------------------------
+# 6. SOCIAL/FAMILY MARKERS
+# --------------------------------------------------------------------------
+SOCIAL_PATTERNS = [
+    # Family dynamics
+    r'\b(parents?|mom|dad|mother|father|family)\s+(?:didn\'t\s+)?(?:support|accept|understand|approve)\b',
+    r'\b(came\s+out\s+to|told)\s+(?:my\s+)?(?:parents?|family|friends?|partner|spouse)\b',
+    r'\b(disowned|kicked\s+out|cut\s+off|no\s+contact|estranged)\b',
+
+    # Peer influence
+    r'\b(friend\s+group|peer\s+pressure|influenced\s+by|encouraged\s+by)\b',
+    r'\b(trans\s+friends?|queer\s+friends?|LGBT\s+community)\b',
+
+    # Name/pronoun changes
+    r'\b(changed\s+my\s+name|new\s+name|chosen\s+name|legal\s+name\s+change)\b',
+    r'\b(pronouns?|they/them|he/him|she/her|preferred\s+pronouns?)\b',
+]
+
+# --------------------------------------------------------------------------
+# 7. MEDICAL COMPLICATIONS/SIDE EFFECTS
+# --------------------------------------------------------------------------
+MEDICAL_COMPLICATION_PATTERNS = [
+    # Hormone side effects
+    r'\b(side\s+effects?|adverse\s+effects?|complications?|problems?)\s+(?:from|with|on)\s+(?:HRT|hormones?|testosterone|estrogen)\b',
+    r'\b(blood\s+clots?|liver\s+damage|mood\s+swings?|acne|hair\s+loss|voice\s+changes?)\b',
+    r'\b(hot\s+flashes?|night\s+sweats?|libido|sex\s+drive|fertility|infertility)\b',
+
+    # Surgery complications
+    r'\b(complications?|infection|healing\s+issues?|revision\s+surgery|botched)\b',
+    r'\b(nerve\s+damage|sensation\s+loss|chronic\s+pain|scarring)\b',
+]
+
+# --------------------------------------------------------------------------
+# 8. TRANSITION TIMING IMPROVEMENTS
+# --------------------------------------------------------------------------
+TRANSITION_TIMING_PATTERNS = [
+    # Specific transition phases
+    r'\b(egg\s+crack|cracked|egg\s+moment)\b',  # Trans community term
+    r'\b(first\s+time|initially|originally)\s+(?:identified|came\s+out|realized)\b',
+    r'\b(always\s+knew|since\s+childhood|from\s+a\s+young\s+age)\b',
+
+    # Rapid onset patterns
+    r'\b(sudden|suddenly|rapid|quickly|fast|overnight)\s+(?:onset|change|realization|decision)\b',
+    r'\b(within\s+(?:weeks?|months?)|in\s+a\s+matter\s+of)\b',
+
+    # Gradual patterns
+    r'\b(gradual|slowly|over\s+time|process|journey|evolution)\b',
+]
+
+# --------------------------------------------------------------------------
+# 9. PROFESSIONAL/EDUCATIONAL CONTEXT
+# --------------------------------------------------------------------------
+PROFESSIONAL_PATTERNS = [
+    # Work/career impact
+    r'\b(work|job|career|workplace|employer|colleagues?)\s+(?:transition|coming\s+out|discrimination)\b',
+    r'\b(HR|human\s+resources|legal\s+name|documentation)\b',
+
+    # Medical professionals
+    r'\b(endocrinologist|gender\s+clinic|informed\s+consent|WPATH|gatekeeping)\b',
+    r'\b(referral|assessment|evaluation|diagnosis|letter)\b',
+]
+
+# --------------------------------------------------------------------------
+# 10. ONLINE / MEDIA INFLUENCE MARKERS
+# --------------------------------------------------------------------------
+# Online platforms and services
+SOCIAL_PLATFORMS = r"(?:reddit|tumblr|twitter|x\.com|tiktok|instagram|insta|youtube|yt|snapchat|discord|4chan|facebook|fb|pinterest|linkedin|twitch|telegram|whatsapp|signal)"
+REDDIT_SPECIFIC = r"(?:r/\w+|subreddit|/r/\w+)"
+PLATFORM_VARIANTS = r"(?:ig|snap|tt|fb|yt|insta)"
+ONLINE_SPACES = r"(?:community|server|forum|group|chat|channel|board|thread|post|feed|timeline|story|stories)"
+
+ONLINE_INFLUENCE_PATTERNS = [
+    # Platform names and variants
+    fr'\b({SOCIAL_PLATFORMS}|{REDDIT_SPECIFIC}|{PLATFORM_VARIANTS})\b',
+
+    # Discovery / influence verbs with platforms
+    fr'\b(found|discovered|learned\s+about|saw|read|watched|joined|posted\s+(?:on|to)|started\s+using|got\s+into|stumbled\s+(?:upon|across)|came\s+across)\s+(?:the\s+)?(?:a\s+)?({SOCIAL_PLATFORMS}|{REDDIT_SPECIFIC}|{ONLINE_SPACES})\b',
+
+    # Prepositions indicating platform usage
+    fr'\b(on|through|via|because\s+of|from|after\s+seeing|while\s+on|browsing)\s+(?:a\s+)?(?:the\s+)?({SOCIAL_PLATFORMS}|{REDDIT_SPECIFIC}|{ONLINE_SPACES})\b',
+
+    # Time-based platform engagement
+    fr'\b(?:(?:first|last|past|initial)\s+)?({NUMBERS})\s*(?:years?|months?|weeks?|days?)\s+(?:on|using|browsing|in|lurking\s+on)\s+({SOCIAL_PLATFORMS}|{REDDIT_SPECIFIC})\b',
+    fr'\b(?:started|began|joined|got\s+on)\s+({SOCIAL_PLATFORMS}|{REDDIT_SPECIFIC})\s+(?:(?:first|last|past|initial)\s+)?({NUMBERS})\s*(?:years?|months?|weeks?|days?)\s+ago\b',
+
+    # Explicit online community context
+    fr'\b(online|internet|social\s+media|digital)\s+({ONLINE_SPACES}|influence|content|algorithm|rabbit\s+hole)\b',
+    fr'\b({ONLINE_SPACES})\s+(?:on|in)\s+({SOCIAL_PLATFORMS}|{REDDIT_SPECIFIC})\b',
+
+    # Trans-specific online spaces
+    fr'\b(trans|transgender|detrans|lgbt|lgbtq\+?|queer|gender)\s+({ONLINE_SPACES}|{SOCIAL_PLATFORMS}|{REDDIT_SPECIFIC})\b',
+    fr'\b({SOCIAL_PLATFORMS}|{REDDIT_SPECIFIC})\s+(trans|transgender|detrans|lgbt|lgbtq\+?|queer|gender)\s+({ONLINE_SPACES})\b',
+
+    # Algorithm and content discovery
+    r'\b(algorithm|recommended|suggested|for\s+you\s+page|fyp|explore\s+page|trending|viral|feed)\b',
+    r'\b(binge\s+watched|scrolled\s+through|deep\s+dive|rabbit\s+hole|echo\s+chamber)\b',
+]
+
+# --------------------------------------------------------------------------
+# 11. GENDER IDENTITY MARKERS
+# --------------------------------------------------------------------------
+GENDER_IDENTITY_PATTERNS = [
+    # Common umbrella terms
+    r'\b(trans|transgender|transsexual|genderqueer|gender\s+fluid|nonbinary|non-binary|enby|nb|agender|bigender|demiboy|demigirl|androgyne|neutrois)\b',
+
+    # Discovery phrases
+    r'\b(realized|figured\s+out|understood|knew|came\s+to\s+terms|identified)\s+(?:that\s+)?(?:I\s+was|I\'m|I\s+am)\s+(?:a\s+)?(trans|nonbinary|genderqueer|enby|trans\s+woman|trans\s+man|demiboy|demigirl)\b',
+
+    # Pronoun change indicators
+    r'\b(started|began|changed)\s+(?:using|going\s+by)\s+(?:they/them|he/him|she/her|xe/xem|ze/hir|fae/faer|any\s+pronouns|no\s+pronouns)\b',
+
+    # Identity exploration context
+    r'\bquestioning\s+(?:my\s+)?gender\b',
+    r'\bidentif(?:y|ied)\s+as\s+(?:trans|nonbinary|genderqueer|enby|agender)\b',
+]
+
+# Marker type -> patterns, in the order markers are emitted for a sentence
+TEMPORAL_PATTERN_GROUPS: List[Tuple[str, List[str]]] = [
+    ('age', AGE_PATTERNS),
+    ('life_stage', LIFE_STAGE_PATTERNS),
+    ('medical_timeline', MEDICAL_PATTERNS),
+    ('gender_identity_timeline', GENDER_IDENTITY_PATTERNS),
+    ('detransition_timeline', DETRANSITION_PATTERNS),
+    ('mental_health_timeline', MENTAL_HEALTH_PATTERNS),
+    ('social_timeline', SOCIAL_PATTERNS),
+    ('medical_complications_timeline', MEDICAL_COMPLICATION_PATTERNS),
+    ('transition_timing_timeline', TRANSITION_TIMING_PATTERNS),
+    ('professional_timeline', PROFESSIONAL_PATTERNS),
+    ('online_influence_timeline', ONLINE_INFLUENCE_PATTERNS),
+]
+
+# Compiled once at import instead of going through re's cache for every
+# pattern on every sentence
+COMPILED_PATTERN_GROUPS = [
+    (marker_type, [(pattern, re.compile(pattern, re.IGNORECASE)) for pattern in patterns])
+    for marker_type, patterns in TEMPORAL_PATTERN_GROUPS
+]
 
 class TimelineGenerator:
-    def __init__(self):
-        """Initialize the timeline generator with database connection and spaCy model."""
-        self.db_connection = None
-        self.nlp = None
-        self._setup_database()
-        self._setup_spacy()
+    def __init__(self, source: Optional[CommentSource] = None, lemma_index: Optional[LemmaIndex] = None,
+                 dedup: Optional['NearDuplicateFilter'] = None, sink: Optional['RedisTimelineSink'] = None):
+        """
+        Initialize the timeline generator with a comment source and spaCy model.
+
+        When no source is given the generator connects to the live Postgres
+        database, as before. If a lemma index is given, every processed user's
+        lemmas are added to it. If a duplicate filter is given, near-duplicate
+        comments are dropped before normalisation. If a sink is given, every
+        user's timeline summary is written to it.
+        """
+        self._source = source
+        self.lemma_index = lemma_index
+        self.dedup = dedup
+        self.sink = sink
+        self._nlp = None
+
+    @property
+    def source(self) -> CommentSource:
+        """Comment source, connecting to Postgres on first use if none was given."""
+        if self._source is None:
+            self._setup_database()
+        return self._source
+
+    @property
+    def nlp(self):
+        """spaCy pipeline, loaded on first use."""
+        if self._nlp is None:
+            self._setup_spacy()
+        return self._nlp
     
     def _setup_database(self):
         """Setup database connection."""
         try:
-            self.db_connection = psycopg2.connect(
-                host=os.getenv('DB_HOST', 'localhost'),
-                database=os.getenv('DB_NAME'),
-                user=os.getenv('DB_USER'),
-                password=os.getenv('DB_PASSWORD'),
-                port=os.getenv('DB_PORT', 5432)
-            )
+            self._source = PostgresCommentSource()
             print("✅ Database connection established")
         except Exception as e:
             print(f"❌ Database connection failed: {e}")
@@ -38,13 +335,15 @@ class TimelineGenerator:
     def _setup_spacy(self):
         """Setup spaCy model for NLP processing."""
         try:
+            import spacy
+
             # Try to load the model, download if not available
             try:
-                self.nlp = spacy.load("en_core_web_sm")
+                self._nlp = spacy.load("en_core_web_sm")
             except OSError:
                 print("📥 Downloading spaCy English model...")
                 os.system("python -m spacy download en_core_web_sm")
-                self.nlp = spacy.load("en_core_web_sm")
+                self._nlp = spacy.load("en_core_web_sm")
             
             print("✅ spaCy model loaded")
         except Exception as e:
@@ -55,72 +354,74 @@ class TimelineGenerator:
         """
         Get all comments for a specific user concatenated together.
         """
-        query = """
-        SELECT 
-            username,
-            COUNT(*) as comment_count,
-            STRING_AGG(text, ' | ' ORDER BY created) as all_comments
-        FROM detrans_comments 
-        WHERE username = %s
-        GROUP BY username
-        """
-        
         try:
-            with self.db_connection.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute(query, (username,))
-                result = cursor.fetchone()
+            comments = self.source.get_user_comments(username)
+            if comments and self.dedup is not None:
+                comments = self.deduplicate_user_comments(username, comments)['all_comments']
                 
-            if result:
-                print(f"✅ Retrieved {result['comment_count']} comments for user: {username}")
-                return result['all_comments']
+            if comments:
+                print(f"✅ Retrieved comments for user: {username} ({self.source.name})")
+                return comments
             else:
                 print(f"❌ No comments found for user: {username}")
                 return None
                 
         except Exception as e:
-            print(f"❌ Database query failed: {e}")
+            print(f"❌ Comment query failed: {e}")
             return None
 
-    def get_users_by_comment_count(self, limit: Optional[int] = None) -> pd.DataFrame:
+    def get_users_by_comment_count(self, limit: Optional[int] = None) -> 'pd.DataFrame':
         """
         Stage 1: Ingestion
         Get users ranked by comment count with all their comments concatenated.
         """
-        query = """
-        SELECT 
-            username,
-            COUNT(*) as comment_count,
-            STRING_AGG(text, ' | ' ORDER BY created) as all_comments
-        FROM detrans_comments 
-        WHERE username IS NOT NULL
-        GROUP BY username
-        ORDER BY comment_count DESC
-        """
-        
-        if limit:
-            query += f" LIMIT {limit}"
-        
         try:
-            with self.db_connection.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute(query)
-                results = cursor.fetchall()
-                
-            df = pd.DataFrame(results)
-            print(f"✅ Retrieved {len(df)} users with comments")
+            df = self.source.get_users_by_comment_count(limit=limit)
+            print(f"✅ Retrieved {len(df)} users with comments ({self.source.name})")
             return df
             
         except Exception as e:
-            print(f"❌ Database query failed: {e}")
+            print(f"❌ Comment query failed: {e}")
+            import pandas as pd
             return pd.DataFrame()
     
+    def deduplicate_user_comments(self, username: str, all_comments: Optional[str]) -> Dict[str, any]:
+        """
+        Stage 1b: Deduplication
+        Rebuild a user's concatenated comments without near-duplicates.
+
+        Works on the aggregated text stage 1 already fetched, split back into
+        comments on COMMENT_SEPARATOR as work_scheduler does, so no comment
+        is read twice. Comments are identified as ``username#position``,
+        their index in the user's oldest-first history.
+        """
+        comments = [
+            {'id': f"{username}#{position}", 'text': text}
+            for position, text in enumerate((all_comments or '').split(COMMENT_SEPARATOR))
+            if text
+        ]
+        kept = self.dedup.filter(comments)
+        return {
+            'username': username,
+            'comment_count': len(kept),
+            'all_comments': COMMENT_SEPARATOR.join(c['text'] for c in kept) or None,
+            'duplicate_count': len(comments) - len(kept),
+        }
+
+    def _deduplicate_users(self, user_rows):
+        """Replace each user row's comments with the deduplicated ones."""
+        for row in user_rows:
+            yield {**row, **self.deduplicate_user_comments(row['username'], row['all_comments'])}
+
     def normalize_text(self, text: str) -> Dict[str, any]:
         """
         Stage 2: Normalisation
         Process text with spaCy: sentence splitting, lemmatization, stop-word removal, anonymization.
         """
-        if not text or pd.isna(text):
+        if not isinstance(text, str) or not text:
             return {
                 'sentences': [],
+                'sentence_lemmas': [],
                 'lemmatized_text': '',
                 'anonymized_text': '',
                 'token_count': 0
@@ -129,16 +430,20 @@ class TimelineGenerator:
         # Process with spaCy
         doc = self.nlp(text)
         
-        # Sentence splitting
-        sentences = [sent.text.strip() for sent in doc.sents if sent.text.strip()]
-        
-        # Lemmatization and stop-word removal
-        lemmatized_tokens = []
-        for token in doc:
-            if not token.is_stop and not token.is_punct and not token.is_space:
-                lemmatized_tokens.append(token.lemma_.lower())
+        # Sentence splitting, with lemmatization and stop-word removal per
+        # sentence so the lemma index can record sentence-level postings
+        sentences = []
+        sentence_lemmas = []
+        for sent in doc.sents:
+            if not sent.text.strip():
+                continue
+            sentences.append(sent.text.strip())
+            sentence_lemmas.append([
+                token.lemma_.lower() for token in sent
+                if not token.is_stop and not token.is_punct and not token.is_space
+            ])
         
-        lemmatized_text = ' '.join(lemmatized_tokens)
+        lemmatized_text = ' '.join(lemma for lemmas in sentence_lemmas for lemma in lemmas)
         
         # Anonymization - replace names and pronouns
         anonymized_text = text
@@ -161,6 +466,7 @@ class TimelineGenerator:
         
         return {
             'sentences': sentences,
+            'sentence_lemmas': sentence_lemmas,
             'lemmatized_text': lemmatized_text,
             'anonymized_text': anonymized_text,
             'token_count': len([t for t in doc if not t.is_space])
@@ -171,416 +477,43 @@ class TimelineGenerator:
         Stage 3: Temporal Tagging (Enhanced)
         Extract age, life-stage, and transition timeline markers
         with detailed coverage for medical, social, and chronological milestones.
+        The pattern catalogue lives in TEMPORAL_PATTERN_GROUPS.
         """
 
-        if not text or pd.isna(text):
+        if not isinstance(text, str) or not text:
             return []
 
         doc = self.nlp(text)
         temporal_markers = []
 
-        # ----------------------------------------------------------------------
-        # 1. AGE-BASED MARKERS
-        # ----------------------------------------------------------------------
-        age_patterns = [
-            r"\b[iI]'?m\s+(\d{1,2})\b",
-            r'\bI\s*(?:am|was|were)\s+(\d{1,2})\b',
-            r'\bat\s+(\d{1,2})\b',
-            r'\bwhen\s+I\s+was\s+(\d{1,2})\b',
-            r'\b(\d{1,2})\s*years?\s*old\b',
-            r'\b(?:turned?|turning)\s+(\d{1,2})\b',
-            r'\b(?:aged?)\s*(\d{1,2})\b',
-            r'\b(\d{1,2})\s*y\.?o\.?\b',
-            r'\b(\d{1,2})\b(?=\s*(?:yr|yrs|year|years)\b)',
-        ]
-
-        # ----------------------------------------------------------------------
-        # 2. LIFE-STAGE / EDUCATIONAL MILESTONES
-        # ----------------------------------------------------------------------
-        life_stage_patterns = [
-            # school / university levels
-            r'\b(freshman|sophomore|junior|senior)\s+(?:year|grade)\b',
-            r'\bgrade\s+(\d{1,2})\b',
-            r'\b(\d{1,2})(?:th|rd|nd|st)\s+grade\b',
-            r'\b(elementary|middle|high)\s+school\b',
-            r'\b(college|university|polytechnic|trade\s+school)\b',
-            r'\b(kindergarten|preschool)\b',
-            r'\b(first|second|third|fourth|fifth)\s+year\b',
-            r'\b(fall|spring|summer|winter)\s+(?:of\s+)?(?:my\s+)?(?:first|second|third|fourth)\s+year\b',
-            r'\bsemester\s+(\d+)\b',
-            r'\bgap\s+year\b',
-
-            # developmental stages
-            r'\b(puberty|teenage|adolescen[ct]|childhood|early\s+twenties|mid\s+twenties|late\s+twenties)\b',
-            r'\b(pre-?teen|prepubescent|young\s+adult|adult\s+life|maturity)\b',
-
-            # trauma and abuse markers
-            r'\b(trauma|traumatic|traumatized|traumatizing)\b',
-            r'\b(abuse|abused|abusive|abuser)\b',
-            r'\b(rape|raped|sexual\s+assault|sexually\s+assaulted)\b',
-            r'\b(molest|molested|molestation|sexual\s+abuse)\b',
-            r'\b(domestic\s+violence|physical\s+abuse|emotional\s+abuse|psychological\s+abuse)\b',
-            r'\b(bullying|bullied|harassment|harassed)\b',
-            r'\b(grooming|groomed|predator|inappropriate\s+touching)\b',
-            r'\b(ptsd|post-?traumatic\s+stress|flashbacks?|triggers?|triggered)\b',
-            r'\b(self-?harm|cutting|suicide\s+attempt|suicidal)\b',
-            r'\b(eating\s+disorder|anorexia|bulimia|body\s+dysmorphia)\b'
-        ]
-
-        # ----------------------------------------------------------------------
-        # 3. MEDICAL / TRANSITION TIMELINES
-        # ----------------------------------------------------------------------
-
-        # Number patterns - both written and numeric forms
-        NUMBERS = r"(?:one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|thirteen|fourteen|fifteen|sixteen|seventeen|eighteen|nineteen|twenty|\d+(?:\.\d+)?)"
-        
-        HORMONES = r"(?:HRT|hormones?|testosterone|T\b|test|estrogen|estradiol|E\b|blockers?|puberty\s+blockers|GnRH)"
-        SURGERIES = r"(?:surgery|surgeries|op|operation|top\s+surgery|bottom\s+surgery|FFS|BA|GCS|GRS|vaginoplasty|mastectomy|phalloplasty|phaloplasty|hysterectomy|facial|orchi|orchiectomy)"
-        TRANSITION_TERMS = r"(?:transition|trans\s+journey|was\s+out|came\s+out|coming\s+out|egg|socially|social\s+transition|medical\s+transition)"
-        DURATION = fr"(?:(?:first|last|past|initial)\s+)?({NUMBERS})\s*(years?|months?|weeks?|days?)"
-
-        medical_patterns = [
-            # Hormone start / initiation
-            fr'\b(started|began|went\s+on|got\s+on|initiated)\s+{HORMONES}\b',
-
-            # Duration on hormones / blockers
-            fr'\b(on|started|been\s+on)\s+{HORMONES}\s+for\s+{DURATION}\b',
-            fr'\b{DURATION}\s+(?:on|into)\s+{HORMONES}\b',
-
-            # Relative timing (before/after starting)
-            fr'\b{DURATION}\s+(?:before|after)\s+(?:starting|start|started|beginning|transitioning|on|going\s+on)\s+(?:{HORMONES}|{SURGERIES}|{TRANSITION_TERMS})\b',
-            fr'\b(before|after)\s+(?:starting|beginning|going\s+on)\s+(?:{HORMONES}|{TRANSITION_TERMS})\b',
-
-            # Countdown-style “T-2 years”
-            fr'\b[TE][-\s]*{DURATION}\b',
-
-            # Surgery / Post-op
-            fr'\b(post|after)\s+{SURGERIES}\b',
-            fr'\b{DURATION}\s+(?:post|after|since)\s+{SURGERIES}\b',
-            fr'\bday\s+(\d+)\s+(?:post-op|after\s+surgery)\b',
-
-            # Dosage / microdosing
-            r'\b(\d+(?:\.\d+)?)\s*(mg|ml|pumps?|units?)\s*(?:daily|weekly|biweekly|monthly)\b',
-            r'\bmicro\s*dose|microdosing\b',
-
-            # Blockers / discontinuation
-            fr'\b(on|started|began)\s+(?:puberty\s+blockers|GnRH)\b',
-            fr'\bstopped|discontinued\s+{HORMONES}\b',
-
-            # Transition phase keywords
-            r'\b(pre-?transition|early\s+transition|mid\s+transition|late\s+transition|post-?transition)\b',
-            fr'\b(?:(?:first|last|past|initial)\s+)?({NUMBERS})\s+days?\s+(?:on|into)\s+{HORMONES}\b',
-            fr'\b(?:(?:first|last|past|initial)\s+)?({NUMBERS})\s+months?\s+(?:on|into)\s+{HORMONES}\b',
-            fr'\b(?:(?:first|last|past|initial)\s+)?({NUMBERS})\s+years?\s+(?:on|into)\s+{HORMONES}\b',
-            fr'\b(first|second|third|fourth|fifth|sixth|seventh|eighth|ninth|tenth)\s+year\s+(?:on|into)\s+{HORMONES}\b'
-        ]
-
-        # ----------------------------------------------------------------------
-        # 4. DETRANSITION-SPECIFIC MARKERS
-        # ----------------------------------------------------------------------
-        detransition_patterns = [
-            # Stopping/discontinuing
-            r'\b(stopped|quit|discontinued|went\s+off|got\s+off|came\s+off)\s+(?:taking\s+)?(?:HRT|hormones?|testosterone|estrogen|T\b|E\b)\b',
-            r'\b(detransition|detrans|de-transition|retransition|going\s+back)\b',
-            r'\b(regret|regretting|wish\s+I\s+hadn\'t|mistake|wrong\s+path)\b',
-            
-            # Reversal processes
-            r'\b(reversal|reverse|undoing|going\s+back|returning\s+to)\b',
-            r'\b(voice\s+training|speech\s+therapy)\s+(?:to\s+)?(?:feminize|masculinize|change\s+back)\b',
-            r'\b(laser\s+hair\s+removal|electrolysis)\s+(?:to\s+remove|for\s+facial\s+hair)\b',
-            
-            # Realization markers
-            r'\b(realized|figured\s+out|came\s+to\s+understand|epiphany|awakening)\s+(?:that\s+)?(?:I\s+was|this\s+was)\s+(?:wrong|a\s+mistake|not\s+right)\b',
-            r'\b(questioning|doubting|second\s+thoughts|having\s+doubts)\s+(?:my\s+)?(?:transition|identity|decision)\b',
-        ]
-
-        # ----------------------------------------------------------------------
-        # 5. MENTAL HEALTH & COMORBIDITY MARKERS
-        # ----------------------------------------------------------------------
-        mental_health_patterns = [
-            # Specific conditions often mentioned
-            r'\b(autism|autistic|ASD|asperger|neurodivergent|ADHD|ADD)\b',
-            r'\b(depression|depressed|anxiety|anxious|OCD|bipolar|BPD|borderline)\b',
-            r'\b(dissociation|dissociative|depersonalization|derealization)\b',
-            r'\b(therapy|therapist|counseling|counselor|psychologist|psychiatrist)\b',
-            r'\b(medication|antidepressant|SSRIs?|mood\s+stabilizer)\b',
-            
-            # Body image issues
-            r'\b(body\s+dysmorphia|dysmorphic|body\s+image|self-image)\b',
-            r'\b(dysphoria|euphoria|gender\s+dysphoria|social\s+dysphoria|body\s+dysphoria)\b',
-        ]
-
-        # ----------------------------------------------------------------------
-        # 6. SOCIAL/FAMILY MARKERS
-        # ----------------------------------------------------------------------
-        social_markers = [
-            # Family dynamics
-            r'\b(parents?|mom|dad|mother|father|family)\s+(?:didn\'t\s+)?(?:support|accept|understand|approve)\b',
-            r'\b(came\s+out\s+to|told)\s+(?:my\s+)?(?:parents?|family|friends?|partner|spouse)\b',
-            r'\b(disowned|kicked\s+out|cut\s+off|no\s+contact|estranged)\b',
-            
-            # Peer influence
-            r'\b(friend\s+group|peer\s+pressure|influenced\s+by|encouraged\s+by)\b',
-            r'\b(trans\s+friends?|queer\s+friends?|LGBT\s+community)\b',
-            
-            # Name/pronoun changes
-            r'\b(changed\s+my\s+name|new\s+name|chosen\s+name|legal\s+name\s+change)\b',
-            r'\b(pronouns?|they/them|he/him|she/her|preferred\s+pronouns?)\b',
-        ]
-
-        # ----------------------------------------------------------------------
-        # 7. MEDICAL COMPLICATIONS/SIDE EFFECTS
-        # ----------------------------------------------------------------------
-        medical_complications = [
-            # Hormone side effects
-            r'\b(side\s+effects?|adverse\s+effects?|complications?|problems?)\s+(?:from|with|on)\s+(?:HRT|hormones?|testosterone|estrogen)\b',
-            r'\b(blood\s+clots?|liver\s+damage|mood\s+swings?|acne|hair\s+loss|voice\s+changes?)\b',
-            r'\b(hot\s+flashes?|night\s+sweats?|libido|sex\s+drive|fertility|infertility)\b',
-            
-            # Surgery complications
-            r'\b(complications?|infection|healing\s+issues?|revision\s+surgery|botched)\b',
-            r'\b(nerve\s+damage|sensation\s+loss|chronic\s+pain|scarring)\b',
-        ]
-
-        # ----------------------------------------------------------------------
-        # 8. TRANSITION TIMING IMPROVEMENTS
-        # ----------------------------------------------------------------------
-        transition_timing_patterns = [
-            # Specific transition phases
-            r'\b(egg\s+crack|cracked|egg\s+moment)\b',  # Trans community term
-            r'\b(first\s+time|initially|originally)\s+(?:identified|came\s+out|realized)\b',
-            r'\b(always\s+knew|since\s+childhood|from\s+a\s+young\s+age)\b',
-            
-            # Rapid onset patterns
-            r'\b(sudden|suddenly|rapid|quickly|fast|overnight)\s+(?:onset|change|realization|decision)\b',
-            r'\b(within\s+(?:weeks?|months?)|in\s+a\s+matter\s+of)\b',
-            
-            # Gradual patterns
-            r'\b(gradual|slowly|over\s+time|process|journey|evolution)\b',
-        ]
-
-        # ----------------------------------------------------------------------
-        # 9. PROFESSIONAL/EDUCATIONAL CONTEXT
-        # ----------------------------------------------------------------------
-        professional_markers = [
-            # Work/career impact
-            r'\b(work|job|career|workplace|employer|colleagues?)\s+(?:transition|coming\s+out|discrimination)\b',
-            r'\b(HR|human\s+resources|legal\s+name|documentation)\b',
-            
-            # Medical professionals
-            r'\b(endocrinologist|gender\s+clinic|informed\s+consent|WPATH|gatekeeping)\b',
-            r'\b(referral|assessment|evaluation|diagnosis|letter)\b',
-        ]
-
-        # ----------------------------------------------------------------------
-        # 10. ONLINE / MEDIA INFLUENCE MARKERS
-        # ----------------------------------------------------------------------
-        # Online platforms and services
-        SOCIAL_PLATFORMS = r"(?:reddit|tumblr|twitter|x\.com|tiktok|instagram|insta|youtube|yt|snapchat|discord|4chan|facebook|fb|pinterest|linkedin|twitch|telegram|whatsapp|signal)"
-        REDDIT_SPECIFIC = r"(?:r/\w+|subreddit|/r/\w+)"
-        PLATFORM_VARIANTS = r"(?:ig|snap|tt|fb|yt|insta)"
-        ONLINE_SPACES = r"(?:community|server|forum|group|chat|channel|board|thread|post|feed|timeline|story|stories)"
-        
-        online_influence_patterns = [
-            # Platform names and variants
-            fr'\b({SOCIAL_PLATFORMS}|{REDDIT_SPECIFIC}|{PLATFORM_VARIANTS})\b',
-
-            # Discovery / influence verbs with platforms
-            fr'\b(found|discovered|learned\s+about|saw|read|watched|joined|posted\s+(?:on|to)|started\s+using|got\s+into|stumbled\s+(?:upon|across)|came\s+across)\s+(?:the\s+)?(?:a\s+)?({SOCIAL_PLATFORMS}|{REDDIT_SPECIFIC}|{ONLINE_SPACES})\b',
-            
-            # Prepositions indicating platform usage
-            fr'\b(on|through|via|because\s+of|from|after\s+seeing|while\s+on|browsing)\s+(?:a\s+)?(?:the\s+)?({SOCIAL_PLATFORMS}|{REDDIT_SPECIFIC}|{ONLINE_SPACES})\b',
-            
-            # Time-based platform engagement
-            fr'\b(?:(?:first|last|past|initial)\s+)?({NUMBERS})\s*(?:years?|months?|weeks?|days?)\s+(?:on|using|browsing|in|lurking\s+on)\s+({SOCIAL_PLATFORMS}|{REDDIT_SPECIFIC})\b',
-            fr'\b(?:started|began|joined|got\s+on)\s+({SOCIAL_PLATFORMS}|{REDDIT_SPECIFIC})\s+(?:(?:first|last|past|initial)\s+)?({NUMBERS})\s*(?:years?|months?|weeks?|days?)\s+ago\b',
-
-            # Explicit online community context
-            fr'\b(online|internet|social\s+media|digital)\s+({ONLINE_SPACES}|influence|content|algorithm|rabbit\s+hole)\b',
-            fr'\b({ONLINE_SPACES})\s+(?:on|in)\s+({SOCIAL_PLATFORMS}|{REDDIT_SPECIFIC})\b',
-            
-            # Trans-specific online spaces
-            fr'\b(trans|transgender|detrans|lgbt|lgbtq\+?|queer|gender)\s+({ONLINE_SPACES}|{SOCIAL_PLATFORMS}|{REDDIT_SPECIFIC})\b',
-            fr'\b({SOCIAL_PLATFORMS}|{REDDIT_SPECIFIC})\s+(trans|transgender|detrans|lgbt|lgbtq\+?|queer|gender)\s+({ONLINE_SPACES})\b',
-            
-            # Algorithm and content discovery
-            r'\b(algorithm|recommended|suggested|for\s+you\s+page|fyp|explore\s+page|trending|viral|feed)\b',
-            r'\b(binge\s+watched|scrolled\s+through|deep\s+dive|rabbit\s+hole|echo\s+chamber)\b',
-        ]
-
-        # ----------------------------------------------------------------------
-        # 11. GENDER IDENTITY MARKERS
-        # ----------------------------------------------------------------------
-        gender_identity_patterns = [
-            # Common umbrella terms
-            r'\b(trans|transgender|transsexual|genderqueer|gender\s+fluid|nonbinary|non-binary|enby|nb|agender|bigender|demiboy|demigirl|androgyne|neutrois)\b',
-
-            # Discovery phrases
-            r'\b(realized|figured\s+out|understood|knew|came\s+to\s+terms|identified)\s+(?:that\s+)?(?:I\s+was|I\'m|I\s+am)\s+(?:a\s+)?(trans|nonbinary|genderqueer|enby|trans\s+woman|trans\s+man|demiboy|demigirl)\b',
-
-            # Pronoun change indicators
-            r'\b(started|began|changed)\s+(?:using|going\s+by)\s+(?:they/them|he/him|she/her|xe/xem|ze/hir|fae/faer|any\s+pronouns|no\s+pronouns)\b',
-
-            # Identity exploration context
-            r'\bquestioning\s+(?:my\s+)?gender\b',
-            r'\bidentif(?:y|ied)\s+as\s+(?:trans|nonbinary|genderqueer|enby|agender)\b',
-        ]
-
-        # ----------------------------------------------------------------------
-        # 12. PROCESSING: EXTRACT & NORMALIZE
-        # ----------------------------------------------------------------------
         for sent in doc.sents:
             sent_text = sent.text.strip()
             if not sent_text:
                 continue
 
-            # AGE
-            for pattern in age_patterns:
-                for match in re.finditer(pattern, sent_text, re.IGNORECASE):
-                    try:
-                        age = int(match.group(1))
-                        if 5 <= age <= 60:
-                            temporal_markers.append({
-                                'sentence': sent_text,
-                                'type': 'age',
-                                'value': age,
-                                'pattern': pattern,
-                                'match_text': match.group(0),
-                                'start_char': sent.start_char + match.start(),
-                                'end_char': sent.start_char + match.end()
-                            })
-                    except Exception:
-                        continue
-
-            # LIFE STAGE
-            for pattern in life_stage_patterns:
-                for match in re.finditer(pattern, sent_text, re.IGNORECASE):
-                    temporal_markers.append({
-                        'sentence': sent_text,
-                        'type': 'life_stage',
-                        'value': match.group(0).lower(),
-                        'pattern': pattern,
-                        'match_text': match.group(0),
-                        'start_char': sent.start_char + match.start(),
-                        'end_char': sent.start_char + match.end()
-                    })
-
-            # MEDICAL / TRANSITION TIMELINE
-            for pattern in medical_patterns:
-                for match in re.finditer(pattern, sent_text, re.IGNORECASE):
-                    temporal_markers.append({
-                        'sentence': sent_text,
-                        'type': 'medical_timeline',
-                        'value': match.group(0).lower(),
-                        'pattern': pattern,
-                        'match_text': match.group(0),
-                        'start_char': sent.start_char + match.start(),
-                        'end_char': sent.start_char + match.end()
-                    })
-
-            # GENDER IDENTITY TIMELINE
-            for pattern in gender_identity_patterns:
-                for match in re.finditer(pattern, sent_text, re.IGNORECASE):
-                    temporal_markers.append({
-                        'sentence': sent_text,
-                        'type': 'gender_identity_timeline',
-                        'value': match.group(0).lower(),
-                        'pattern': pattern,
-                        'match_text': match.group(0),
-                        'start_char': sent.start_char + match.start(),
-                        'end_char': sent.start_char + match.end()
-                    })
-
-            # DETRANSITION TIMELINE
-            for pattern in detransition_patterns:
-                for match in re.finditer(pattern, sent_text, re.IGNORECASE):
-                    temporal_markers.append({
-                        'sentence': sent_text,
-                        'type': 'detransition_timeline',
-                        'value': match.group(0).lower(),
-                        'pattern': pattern,
-                        'match_text': match.group(0),
-                        'start_char': sent.start_char + match.start(),
-                        'end_char': sent.start_char + match.end()
-                    })
-
-            # MENTAL HEALTH TIMELINE
-            for pattern in mental_health_patterns:
-                for match in re.finditer(pattern, sent_text, re.IGNORECASE):
-                    temporal_markers.append({
-                        'sentence': sent_text,
-                        'type': 'mental_health_timeline',
-                        'value': match.group(0).lower(),
-                        'pattern': pattern,
-                        'match_text': match.group(0),
-                        'start_char': sent.start_char + match.start(),
-                        'end_char': sent.start_char + match.end()
-                    })
-
-            # SOCIAL TIMELINE
-            for pattern in social_markers:
-                for match in re.finditer(pattern, sent_text, re.IGNORECASE):
-                    temporal_markers.append({
-                        'sentence': sent_text,
-                        'type': 'social_timeline',
-                        'value': match.group(0).lower(),
-                        'pattern': pattern,
-                        'match_text': match.group(0),
-                        'start_char': sent.start_char + match.start(),
-                        'end_char': sent.start_char + match.end()
-                    })
-
-            # MEDICAL COMPLICATIONS TIMELINE
-            for pattern in medical_complications:
-                for match in re.finditer(pattern, sent_text, re.IGNORECASE):
-                    temporal_markers.append({
-                        'sentence': sent_text,
-                        'type': 'medical_complications_timeline',
-                        'value': match.group(0).lower(),
-                        'pattern': pattern,
-                        'match_text': match.group(0),
-                        'start_char': sent.start_char + match.start(),
-                        'end_char': sent.start_char + match.end()
-                    })
-
-            # TRANSITION TIMING TIMELINE
-            for pattern in transition_timing_patterns:
-                for match in re.finditer(pattern, sent_text, re.IGNORECASE):
-                    temporal_markers.append({
-                        'sentence': sent_text,
-                        'type': 'transition_timing_timeline',
-                        'value': match.group(0).lower(),
-                        'pattern': pattern,
-                        'match_text': match.group(0),
-                        'start_char': sent.start_char + match.start(),
-                        'end_char': sent.start_char + match.end()
-                    })
-
-            # PROFESSIONAL TIMELINE
-            for pattern in professional_markers:
-                for match in re.finditer(pattern, sent_text, re.IGNORECASE):
-                    temporal_markers.append({
-                        'sentence': sent_text,
-                        'type': 'professional_timeline',
-                        'value': match.group(0).lower(),
-                        'pattern': pattern,
-                        'match_text': match.group(0),
-                        'start_char': sent.start_char + match.start(),
-                        'end_char': sent.start_char + match.end()
-                    })
-
-            # ONLINE INFLUENCE TIMELINE
-            for pattern in online_influence_patterns:
-                for match in re.finditer(pattern, sent_text, re.IGNORECASE):
-                    temporal_markers.append({
-                        'sentence': sent_text,
-                        'type': 'online_influence_timeline',
-                        'value': match.group(0).lower(),
-                        'pattern': pattern,
-                        'match_text': match.group(0),
-                        'start_char': sent.start_char + match.start(),
-                        'end_char': sent.start_char + match.end()
-                    })
+            for marker_type, compiled_patterns in COMPILED_PATTERN_GROUPS:
+                for pattern, regex in compiled_patterns:
+                    for match in regex.finditer(sent_text):
+                        if marker_type == 'age':
+                            # AGE values are numeric and bounded to plausible ages
+                            try:
+                                value = int(match.group(1))
+                            except Exception:
+                                continue
+                            if not 5 <= value <= 60:
+                                continue
+                        else:
+                            value = match.group(0).lower()
+
+                        temporal_markers.append({
+                            'sentence': sent_text,
+                            'type': marker_type,
+                            'value': value,
+                            'pattern': pattern,
+                            'match_text': match.group(0),
+                            'start_char': sent.start_char + match.start(),
+                            'end_char': sent.start_char + match.end()
+                        })
 
         return temporal_markers
 
@@ -594,6 +527,9 @@ class TimelineGenerator:
         normalized = self.normalize_text(comments)
         normalized_text = normalized['anonymized_text'] if isinstance(normalized, dict) else comments
 
+        if self.lemma_index is not None:
+            self.lemma_index.add_user(username, normalized['sentence_lemmas'])
+
         # Stage 3: Extract temporal markers from normalized text
         temporal_markers = self.extract_temporal_markers(normalized_text)
 
@@ -646,45 +582,138 @@ class TimelineGenerator:
         
         return result
 
-    def run_pipeline(self, limit_users: Optional[int] = 10):
+    def _process_users(self, user_rows):
+        """Process user rows one after another in this process."""
+        for row in user_rows:
+            try:
+                yield self.process_user_comments(row['username'], row['all_comments'])
+            except Exception as e:
+                print(f"❌ Error processing {row['username']}: {e}")
+
+    def _process_users_in_pool(self, user_rows, workers: int, max_task_chars: Optional[int] = None):
+        """
+        Process user rows in a pool of worker processes.
+
+        Users are costed and split by work_scheduler.plan_tasks and queued
+        largest first, so idle workers keep pulling work while the biggest
+        histories are still running. Each worker loads spaCy once in its
+        initializer and reuses it for every task it is handed. Split users
+        are merged once all their chunks are done; lemma postings are
+        written here, in the parent, since the index is a single SQLite file.
+
+        If a worker dies (e.g. OOM-killed) the pool breaks; the users already
+        yielded are kept and the ones left unfinished are reported.
+        """
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        from concurrent.futures.process import BrokenProcessPool
+
+        tasks = plan_tasks(list(user_rows), workers, max_task_cost=max_task_chars)
+        split_users = len({task['username'] for task in tasks if task['chunks'] > 1})
+        print(f"  Scheduled {len(tasks)} tasks ({split_users} users split), largest first")
+
+        stats = WorkerStats(workers)
+        pending: Dict[str, Dict[int, Dict[str, any]]] = {}
+        failed = set()
+        completed = set()
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            futures = {executor.submit(_process_task_in_worker, task['username'], task['text']): task for task in tasks}
+            try:
+                for future in as_completed(futures):
+                    task = futures[future]
+                    username = task['username']
+                    result, error, pid, seconds = future.result()
+                    stats.record(pid, seconds, task['cost'])
+                    if error:
+                        print(f"❌ Error processing {username}: {error}")
+                        failed.add(username)
+                        pending.pop(username, None)
+                        continue
+                    if username in failed:
+                        continue
+
+                    chunks = pending.setdefault(username, {})
+                    chunks[task['chunk']] = result
+                    if len(chunks) < task['chunks']:
+                        continue
+                    del pending[username]
+
+                    result = merge_results(username, [chunks[index] for index in range(task['chunks'])])
+                    if self.lemma_index is not None:
+                        self.lemma_index.add_user(username, result['normalized']['sentence_lemmas'])
+                    completed.add(username)
+                    yield result
+            except BrokenProcessPool as e:
+                unfinished = {task['username'] for task in tasks} - completed - failed
+                unfinished_tasks = sum(1 for task in tasks if task['username'] in unfinished)
+                print(f"❌ Worker pool broke ({e}); {len(completed)} users finished, "
+                      f"{len(unfinished)} users ({unfinished_tasks} tasks) left unprocessed:")
+                for username in sorted(unfinished):
+                    print(f"  {username}")
+
+        stats.report(time.perf_counter() - started)
+
+    def run_pipeline(self, limit_users: Optional[int] = 10, partitions: int = 1, workers: int = 1,
+                     max_task_chars: Optional[int] = None):
         """
         Run the complete pipeline for stages 1-3.
+
+        With ``partitions`` > 1 users are streamed from hash(username) mod N
+        slices read concurrently, instead of one ranked query. With
+        ``workers`` > 1 stages 2-3 run in a process pool, scheduled largest
+        first with users above ``max_task_chars`` split into comment ranges.
         """
         print("🚀 Starting Timeline Generation Pipeline")
         print("=" * 50)
         
         # Stage 1: Get user data
-        print("\n📊 Stage 1: Data Ingestion")
-        users_df = self.get_users_by_comment_count(limit=limit_users)
-        
-        if users_df.empty:
-            print("❌ No user data retrieved")
-            return
-        
-        print(f"Top 5 users by comment count:")
-        for _, row in users_df.head().iterrows():
-            print(f"  {row['username']}: {row['comment_count']} comments")
+        if partitions > 1:
+            print(f"\n📊 Stage 1: Data Ingestion ({partitions} partitions)")
+            user_rows = self.source.stream_partitions(partitions)
+            if limit_users:
+                user_rows = itertools.islice(user_rows, limit_users)
+            total_users = limit_users or '?'
+        else:
+            print("\n📊 Stage 1: Data Ingestion")
+            users_df = self.get_users_by_comment_count(limit=limit_users)
+            
+            if users_df.empty:
+                print("❌ No user data retrieved")
+                return
+            
+            print(f"Top 5 users by comment count:")
+            for _, row in users_df.head().iterrows():
+                print(f"  {row['username']}: {row['comment_count']} comments")
+            user_rows = users_df.to_dict('records')
+            total_users = len(users_df)
         
+        if self.dedup is not None:
+            print(f"\n🧹 Dropping near-duplicate comments ({self.dedup.scope}, threshold {self.dedup.threshold})")
+            user_rows = self._deduplicate_users(user_rows)
+
         # Process each user through stages 2-3
-        print(f"\n🔄 Processing {len(users_df)} users through normalization and temporal tagging...")
+        print(f"\n🔄 Processing {total_users} users through normalization and temporal tagging...")
         
+        if workers > 1:
+            results = self._process_users_in_pool(user_rows, workers, max_task_chars=max_task_chars)
+        else:
+            results = self._process_users(user_rows)
+
         processed_users = []
-        for idx, row in users_df.iterrows():
-            try:
-                result = self.process_user_comments(row['username'], row['all_comments'])
-                processed_users.append(result)
-                
-                # Print progress every 10 users
-                if (idx + 1) % 10 == 0:
-                    print(f"  Processed {idx + 1}/{len(users_df)} users")
-                    
-            except Exception as e:
-                print(f"❌ Error processing {row['username']}: {e}")
-                continue
+        for result in results:
+            processed_users.append(result)
+            if self.sink is not None:
+                self.sink.add(result)
+            
+            # Print progress every 10 users
+            if len(processed_users) % 10 == 0:
+                print(f"  Processed {len(processed_users)}/{total_users} users")
         
         # Summary statistics
         print(f"\n📈 Pipeline Summary:")
         print(f"  Users processed: {len(processed_users)}")
+        if self.dedup is not None:
+            print(f"  Near-duplicate comments dropped: {len(self.dedup.duplicates)}/{self.dedup.comments_seen}")
         
         total_temporal_sentences = sum(u['temporal_sentence_count'] for u in processed_users)
         total_sentences = sum(u['total_sentences'] for u in processed_users)
@@ -701,26 +730,217 @@ class TimelineGenerator:
         
         return processed_users
     
+    def run_benchmark(self, limit_users: Optional[int] = 20) -> Dict[str, float]:
+        """
+        Time each pipeline stage over the top users and print throughput.
+        """
+        print("⏱️ Benchmarking Timeline Generation Pipeline")
+        print("=" * 50)
+
+        timings = {}
+
+        start = time.perf_counter()
+        users_df = self.get_users_by_comment_count(limit=limit_users)
+        timings['ingestion'] = time.perf_counter() - start
+        if users_df.empty:
+            print("❌ No user data retrieved")
+            return timings
+
+        start = time.perf_counter()
+        self.nlp
+        timings['model_load'] = time.perf_counter() - start
+
+        timings['normalisation'] = 0.0
+        timings['temporal_tagging'] = 0.0
+        total_chars = 0
+        total_markers = 0
+        for row in users_df.to_dict('records'):
+            comments = row['all_comments'] or ''
+            total_chars += len(comments)
+
+            start = time.perf_counter()
+            normalized = self.normalize_text(comments)
+            timings['normalisation'] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            total_markers += len(self.extract_temporal_markers(normalized['anonymized_text']))
+            timings['temporal_tagging'] += time.perf_counter() - start
+
+        processing = timings['normalisation'] + timings['temporal_tagging']
+        print(f"\n📈 Benchmark ({len(users_df)} users, {total_chars / 1_000_000:.2f} MB, {total_markers} markers):")
+        for stage, seconds in timings.items():
+            print(f"  {stage:<18} {seconds:8.2f}s")
+        if processing > 0:
+            print(f"  {'users/sec':<18} {len(users_df) / processing:8.2f}")
+            print(f"  {'MB/sec':<18} {total_chars / 1_000_000 / processing:8.2f}")
+        return timings
+
     def close(self):
         """Clean up resources."""
-        if self.db_connection:
-            self.db_connection.close()
-            print("✅ Database connection closed")
-
-def main():
+        if self._source:
+            self._source.close()
+            print(f"✅ Comment source closed ({self._source.name})")
+        if self.lemma_index is not None:
+            self.lemma_index.close()
+            print(f"✅ Lemma index written to {self.lemma_index.path}")
+
+# Per-process generator used by pool workers; created once by _init_worker
+_worker_generator: Optional[TimelineGenerator] = None
+
+def _init_worker():
+    """Pool initializer: load spaCy once per worker process."""
+    global _worker_generator
+    _worker_generator = TimelineGenerator()
+    _worker_generator.nlp
+
+def _process_task_in_worker(username: str, comments: str) -> Tuple[Optional[Dict[str, any]], Optional[str], int, float]:
+    """Run stages 2-3 for one scheduled task inside a pool worker; also report the time it took."""
+    start = time.perf_counter()
+    try:
+        result, error = _worker_generator.process_user_comments(username, comments), None
+    except Exception as e:
+        result, error = None, str(e)
+    return result, error, os.getpid(), time.perf_counter() - start
+
+COMMANDS = ('test-user', 'run', 'export', 'bench')
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the subcommand CLI."""
+    parser = argparse.ArgumentParser(description="Timeline generation pipeline (stages 1-3)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_source_argument(subparser):
+        subparser.add_argument(
+            '--source',
+            help="Comment source: 'postgres' (default) or a .jsonl/.ndjson/.sqlite/.db/.parquet export"
+        )
+
+    test_user = subparsers.add_parser('test-user', help="Extract and print temporal markers for one user")
+    test_user.add_argument('username')
+    add_source_argument(test_user)
+
+    run = subparsers.add_parser('run', help="Run stages 1-3 over the top users")
+    add_source_argument(run)
+    run.add_argument('--limit', type=int, default=50, help="Number of users to process (default: 50)")
+    run.add_argument('--partitions', type=int, default=1, help="Read users as N hash partitions concurrently")
+    run.add_argument('--workers', type=int, default=1, help="Worker processes for normalisation and tagging")
+    run.add_argument('--max-task-chars', type=int,
+                     help="Split users above this estimated cost across workers (default: from total work)")
+    run.add_argument('--lemma-index', help="Write lemma postings to this SQLite file")
+    run.add_argument('--dedup', choices=['off', 'user', 'corpus'], default='off',
+                     help="Drop near-duplicate comments per user or across the corpus (default: off)")
+    run.add_argument('--dedup-threshold', type=float, default=0.8,
+                     help="Estimated Jaccard similarity at which comments count as duplicates (default: 0.8)")
+    run.add_argument('--dedup-map', help="Write {dropped comment: kept comment} to this JSON file, comments as username#position")
+    run.add_argument('--redis', nargs='?', const='', metavar='URL',
+                     help="Publish timeline summaries to Redis (default URL: $REDIS_URL)")
+    run.add_argument('--dry-run', action='store_true', help="Require an offline --source; never touch Postgres")
+
+    export = subparsers.add_parser('export', help="Export detrans_comments for offline runs")
+    export.add_argument('output', help="Output .jsonl/.ndjson/.sqlite/.db/.parquet file")
+    add_source_argument(export)
+
+    bench = subparsers.add_parser('bench', help="Time each pipeline stage")
+    add_source_argument(bench)
+    bench.add_argument('--limit', type=int, default=20, help="Number of users to benchmark (default: 20)")
+
+    return parser
+
+def validate_args(args: argparse.Namespace):
+    """Check arguments before any heavy resource is created."""
+    from comment_sources import FILE_SOURCES
+
+    if args.source not in (None, 'postgres'):
+        extension = os.path.splitext(args.source)[1].lower()
+        if extension not in FILE_SOURCES:
+            raise ValueError(f"unsupported --source '{args.source}'")
+        if not os.path.exists(args.source):
+            raise ValueError(f"--source not found: {args.source}")
+
+    if args.command == 'export':
+        if os.path.splitext(args.output)[1].lower() not in FILE_SOURCES:
+            raise ValueError(f"unsupported export format: {args.output}")
+
+    if args.command == 'run':
+        if args.dry_run and args.source in (None, 'postgres'):
+            raise ValueError("--dry-run needs an offline --source (.jsonl, .sqlite, .db or .parquet)")
+        if args.partitions < 1 or args.workers < 1:
+            raise ValueError("--partitions and --workers must be at least 1")
+        if not 0 < args.dedup_threshold <= 1:
+            raise ValueError("--dedup-threshold must be in (0, 1]")
+        if args.dedup_map and args.dedup == 'off':
+            raise ValueError("--dedup-map needs --dedup user or --dedup corpus")
+
+def main(argv: Optional[List[str]] = None):
     """Main function to run the timeline generation pipeline."""
-    generator = TimelineGenerator()
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # Keep the old `generate_timelines.py [username] [--dry-run]` invocations working
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ('-h', '--help')):
+        argv = (['test-user'] if argv and not argv[0].startswith('-') else ['run']) + argv
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        validate_args(args)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # Load environment variables
+    load_dotenv()
+
+    partitions = getattr(args, 'partitions', 1)
+    try:
+        # One pooled connection per partition reader plus one spare
+        source = open_comment_source(args.source, pool_size=partitions + 1)
+        print(f"✅ Comment source opened: {args.source or 'postgres'} ({source.name})")
+    except Exception as e:
+        print(f"❌ Could not open comment source: {e}")
+        sys.exit(1)
+
+    if args.command == 'export':
+        # Dump the table so later runs can use --source offline
+        try:
+            count = export_comments(source, args.output)
+            print(f"✅ Exported {count} comments to {args.output}")
+        finally:
+            source.close()
+        return
+
+    lemma_index = None
+    if getattr(args, 'lemma_index', None):
+        lemma_index = LemmaIndex(args.lemma_index)
+    dedup = None
+    if getattr(args, 'dedup', 'off') != 'off':
+        from comment_dedup import NearDuplicateFilter
+        dedup = NearDuplicateFilter(threshold=args.dedup_threshold, scope=args.dedup)
+    generator = TimelineGenerator(source=source, lemma_index=lemma_index, dedup=dedup)
+    sink = None
     
     try:
-        # Check if username provided as command line argument
-        if len(sys.argv) > 1 and sys.argv[1] != "--dry-run":
-            username = sys.argv[1]
-            print(f"🎯 Testing mode: Processing user '{username}'")
-            generator.test_user_extraction(username)
+        if getattr(args, 'redis', None) is not None:
+            from timeline_sink import RedisTimelineSink
+            sink = generator.sink = RedisTimelineSink(url=args.redis or None)
+
+        if args.command == 'test-user':
+            print(f"🎯 Testing mode: Processing user '{args.username}'")
+            generator.test_user_extraction(args.username)
+        elif args.command == 'bench':
+            generator.run_benchmark(limit_users=args.limit)
         else:
-            # Run pipeline with first 50 users for testing
             print("🚀 Running full pipeline mode")
-            results = generator.run_pipeline(limit_users=50)
+            results = generator.run_pipeline(
+                limit_users=args.limit, partitions=args.partitions, workers=args.workers,
+                max_task_chars=args.max_task_chars
+            )
+            if sink is not None and results:
+                # Only a completed run replaces the one the app is reading
+                sink.publish()
+                sink.close()
+                sink = None
+            if args.dedup_map:
+                with open(args.dedup_map, 'w', encoding='utf-8') as f:
+                    json.dump(dedup.duplicates, f, indent=2)
+                print(f"✅ Duplicate map written to {args.dedup_map}")
             print("\n✅ Pipeline stages 1-3 completed successfully!")
         
     except KeyboardInterrupt:
@@ -728,6 +948,12 @@ def main():
     except Exception as e:
         print(f"\n❌ Pipeline failed: {e}")
     finally:
+        if sink is not None:
+            try:
+                sink.discard()
+            except Exception as e:
+                print(f"⚠️ Could not discard Redis run {sink.run_id}: {e}")
+            sink.close()
         generator.close()
 
 if __name__ == "__main__":
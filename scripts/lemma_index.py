@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Inverted index of the lemmas produced by TimelineGenerator.normalize_text.
+
+Postings map lemma -> (user, sentence) with a count and are stored in a
+single SQLite file using integer ids and WITHOUT ROWID tables, so corpus-wide
+term questions ("which users mention testosterone and regret?") are answered
+from the index instead of re-scanning detrans_comments.
+
+Usage:
+    python lemma_index.py timeline_lemmas.sqlite testosterone regret
+    python lemma_index.py timeline_lemmas.sqlite testosterone regret --any
+    python lemma_index.py timeline_lemmas.sqlite testosterone regret --sentences
+    python lemma_index.py timeline_lemmas.sqlite --top 25
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+from collections import Counter
+from typing import Dict, List, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lemmas (
+    id INTEGER PRIMARY KEY,
+    lemma TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE,
+    sentence_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS postings (
+    lemma_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    sentence_idx INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (lemma_id, user_id, sentence_idx)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_postings_user ON postings (user_id, lemma_id);
+"""
+
+# add_user upserts with INSERT ... ON CONFLICT ... RETURNING
+MIN_SQLITE_VERSION = (3, 35, 0)
+
+
+class LemmaIndex:
+    """
+    Persistent lemma -> user/sentence postings with a small query API.
+
+    With ``read_only`` the index must already exist and is opened read-only,
+    so a mistyped path fails instead of creating an empty index.
+    """
+
+    def __init__(self, path: str, commit_every: int = 100, read_only: bool = False):
+        self.path = path
+        self.commit_every = commit_every
+        if read_only:
+            if not os.path.isfile(path):
+                raise FileNotFoundError(f"Lemma index not found: {path}")
+            self.connection = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True)
+        else:
+            if sqlite3.sqlite_version_info < MIN_SQLITE_VERSION:
+                raise RuntimeError(
+                    f"Building the lemma index needs SQLite "
+                    f"{'.'.join(map(str, MIN_SQLITE_VERSION))}+ (found {sqlite3.sqlite_version})"
+                )
+            self.connection = sqlite3.connect(path)
+            self.connection.executescript(SCHEMA)
+            self.connection.execute("PRAGMA journal_mode = WAL")
+            self.connection.execute("PRAGMA synchronous = NORMAL")
+        self._lemma_ids: Dict[str, int] = dict(
+            (lemma, lemma_id) for lemma_id, lemma in self.connection.execute("SELECT id, lemma FROM lemmas")
+        )
+        self._pending_users = 0
+
+    def _lemma_id(self, lemma: str) -> int:
+        lemma_id = self._lemma_ids.get(lemma)
+        if lemma_id is None:
+            cursor = self.connection.execute("INSERT INTO lemmas (lemma) VALUES (?)", (lemma,))
+            lemma_id = cursor.lastrowid
+            self._lemma_ids[lemma] = lemma_id
+        return lemma_id
+
+    def add_user(self, username: str, sentence_lemmas: List[List[str]]):
+        """Index (or re-index) one user's lemmas, one list per sentence."""
+        cursor = self.connection.execute(
+            """
+            INSERT INTO users (username, sentence_count) VALUES (?, ?)
+            ON CONFLICT (username) DO UPDATE SET sentence_count = excluded.sentence_count
+            RETURNING id
+            """,
+            (username, len(sentence_lemmas))
+        )
+        user_id = cursor.fetchone()[0]
+        self.connection.execute("DELETE FROM postings WHERE user_id = ?", (user_id,))
+
+        rows = []
+        for sentence_idx, lemmas in enumerate(sentence_lemmas):
+            for lemma, count in Counter(lemmas).items():
+                rows.append((self._lemma_id(lemma), user_id, sentence_idx, count))
+        self.connection.executemany(
+            "INSERT INTO postings (lemma_id, user_id, sentence_idx, count) VALUES (?, ?, ?, ?)",
+            rows
+        )
+
+        self._pending_users += 1
+        if self._pending_users >= self.commit_every:
+            self.commit()
+
+    def commit(self):
+        self.connection.commit()
+        self._pending_users = 0
+
+    def _lemma_ids_for(self, lemmas: List[str]) -> List[int]:
+        return [self._lemma_ids.get(lemma.lower(), -1) for lemma in lemmas]
+
+    def users_with_all(self, lemmas: List[str]) -> List[Tuple[str, int]]:
+        """Users whose comments contain every lemma, with the summed count."""
+        lemma_ids = self._lemma_ids_for(lemmas)
+        if not lemma_ids or -1 in lemma_ids:
+            return []
+        placeholders = ', '.join('?' * len(lemma_ids))
+        return self.connection.execute(
+            f"""
+            SELECT u.username, SUM(p.count) AS total
+            FROM postings p JOIN users u ON u.id = p.user_id
+            WHERE p.lemma_id IN ({placeholders})
+            GROUP BY p.user_id
+            HAVING COUNT(DISTINCT p.lemma_id) = ?
+            ORDER BY total DESC
+            """,
+            (*lemma_ids, len(lemma_ids))
+        ).fetchall()
+
+    def users_with_any(self, lemmas: List[str]) -> List[Tuple[str, int]]:
+        """Users whose comments contain at least one of the lemmas."""
+        lemma_ids = [lemma_id for lemma_id in self._lemma_ids_for(lemmas) if lemma_id != -1]
+        if not lemma_ids:
+            return []
+        placeholders = ', '.join('?' * len(lemma_ids))
+        return self.connection.execute(
+            f"""
+            SELECT u.username, SUM(p.count) AS total
+            FROM postings p JOIN users u ON u.id = p.user_id
+            WHERE p.lemma_id IN ({placeholders})
+            GROUP BY p.user_id
+            ORDER BY total DESC
+            """,
+            lemma_ids
+        ).fetchall()
+
+    def sentences_with_all(self, lemmas: List[str]) -> List[Tuple[str, int]]:
+        """(username, sentence index) pairs where every lemma occurs in the same sentence."""
+        lemma_ids = self._lemma_ids_for(lemmas)
+        if not lemma_ids or -1 in lemma_ids:
+            return []
+        placeholders = ', '.join('?' * len(lemma_ids))
+        return self.connection.execute(
+            f"""
+            SELECT u.username, p.sentence_idx
+            FROM postings p JOIN users u ON u.id = p.user_id
+            WHERE p.lemma_id IN ({placeholders})
+            GROUP BY p.user_id, p.sentence_idx
+            HAVING COUNT(DISTINCT p.lemma_id) = ?
+            ORDER BY u.username, p.sentence_idx
+            """,
+            (*lemma_ids, len(lemma_ids))
+        ).fetchall()
+
+    def top_lemmas(self, limit: int = 20) -> List[Tuple[str, int, int]]:
+        """Most frequent lemmas as (lemma, total count, number of users)."""
+        return self.connection.execute(
+            """
+            SELECT l.lemma, SUM(p.count) AS total, COUNT(DISTINCT p.user_id) AS users
+            FROM postings p JOIN lemmas l ON l.id = p.lemma_id
+            GROUP BY p.lemma_id
+            ORDER BY total DESC
+            LIMIT ?
+            """,
+            (limit,)
+        ).fetchall()
+
+    def close(self):
+        if self.connection:
+            self.commit()
+            self.connection.close()
+            self.connection = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the timeline lemma index")
+    parser.add_argument('index', help="Path to the SQLite lemma index")
+    parser.add_argument('lemmas', nargs='*', help="Lemmas to look up (lowercase)")
+    parser.add_argument('--any', action='store_true', help="Match users with any lemma instead of all")
+    parser.add_argument('--sentences', action='store_true', help="Require the lemmas to co-occur in one sentence")
+    parser.add_argument('--top', type=int, help="Show the N most frequent lemmas")
+    parser.add_argument('--limit', type=int, default=50, help="Maximum rows to print")
+    args = parser.parse_args()
+
+    try:
+        index = LemmaIndex(args.index, read_only=True)
+    except (FileNotFoundError, sqlite3.Error) as e:
+        print(f"❌ Could not open lemma index: {e}")
+        sys.exit(1)
+
+    try:
+        start = time.perf_counter()
+        if args.top:
+            rows = index.top_lemmas(args.top)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            for lemma, total, users in rows:
+                print(f"  {lemma}: {total} occurrences across {users} users")
+        elif args.lemmas:
+            if args.sentences:
+                rows = index.sentences_with_all(args.lemmas)
+            elif args.any:
+                rows = index.users_with_any(args.lemmas)
+            else:
+                rows = index.users_with_all(args.lemmas)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            for row in rows[:args.limit]:
+                print(f"  {row[0]}: {row[1]}")
+            if len(rows) > args.limit:
+                print(f"  ... and {len(rows) - args.limit} more")
+            print(f"{len(rows)} results")
+        else:
+            parser.error("give lemmas to look up or --top N")
+        print(f"Query took {elapsed_ms:.1f} ms")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Bulk-load embeddings of detrans_comments into pgvector.
+
+Comment text is streamed from a server-side cursor, embedded in batches
+through embedding_providers, and written with binary COPY into a staging
+table, one batch in memory at a time. Once every row is loaded the staging
+table either replaces the target table (swap, the default) or is merged
+into it (merge). The HNSW / IVFFlat index is only built after the load, so
+rows are never inserted one at a time into an index.
+
+    detrans_comment_embeddings (uuid varchar(50) PRIMARY KEY, embedding vector(dim))
+
+Usage:
+    python load_comment_embeddings.py                                # full rebuild, HNSW index
+    python load_comment_embeddings.py --mode merge --incremental     # embed new comments only
+    python load_comment_embeddings.py --provider local --index ivfflat
+    python load_comment_embeddings.py --limit 1000                   # trial run, merged
+
+A swap only happens when every comment was embedded: a failed batch or a
+--limit would otherwise replace the table with a partial one.
+"""
+
+import argparse
+import io
+import struct
+import sys
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from comment_sources import PostgresCommentSource
+from embedding_providers import PROVIDERS, EmbeddingProvider, get_embedding_provider
+
+TARGET_TABLE = 'detrans_comment_embeddings'
+STAGING_TABLE = 'detrans_comment_embeddings_staging'
+
+# pgvector cannot index vectors wider than this
+MAX_INDEXED_DIMENSIONS = 2000
+
+# Binary COPY framing: signature, flags, header extension length / trailer
+COPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+COPY_TRAILER = struct.pack('!h', -1)
+
+
+def encode_copy_batch(uuids: List[str], embeddings: np.ndarray) -> io.BytesIO:
+    """
+    Encode (uuid, embedding) rows in PostgreSQL binary COPY format.
+
+    A vector field is its int16 dimension, an unused int16, then the values
+    as big-endian float32 - the layout of pgvector's vector_recv.
+    """
+    dimension = embeddings.shape[1]
+    vector_header = struct.pack('!ihh', 4 + 4 * dimension, dimension, 0)
+    values = embeddings.astype('>f4', copy=False)
+
+    buffer = io.BytesIO()
+    buffer.write(COPY_HEADER)
+    for uuid, vector in zip(uuids, values):
+        encoded = uuid.encode('utf-8')
+        buffer.write(struct.pack('!hi', 2, len(encoded)))
+        buffer.write(encoded)
+        buffer.write(vector_header)
+        buffer.write(vector.tobytes())
+    buffer.write(COPY_TRAILER)
+    buffer.seek(0)
+    return buffer
+
+
+def index_sql(table: str, kind: str, rows: int) -> Optional[str]:
+    """CREATE INDEX statement for ``kind`` (hnsw, ivfflat or none)."""
+    if kind == 'hnsw':
+        return (f"CREATE INDEX IF NOT EXISTS {table}_embedding_hnsw ON {table} "
+                f"USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)")
+    if kind == 'ivfflat':
+        # pgvector's guidance: rows / 1000 lists up to 1M rows, sqrt(rows) beyond
+        lists = max(1, rows // 1000 if rows <= 1_000_000 else int(rows ** 0.5))
+        return (f"CREATE INDEX IF NOT EXISTS {table}_embedding_ivfflat ON {table} "
+                f"USING ivfflat (embedding vector_cosine_ops) WITH (lists = {lists})")
+    return None
+
+
+class CommentEmbeddingLoader:
+    """Streams comments, embeds them and bulk-loads the vectors into Postgres."""
+
+    def __init__(self, provider: EmbeddingProvider, batch_size: int = 500, max_chars: int = 8000):
+        self.provider = provider
+        self.batch_size = batch_size
+        self.max_chars = max_chars
+        # One connection reads, the other writes
+        self.source = PostgresCommentSource(pool_size=2)
+
+    def prepare(self, writer, mode: str, dimension: int):
+        """Create the target table if needed and an empty staging table."""
+        writer.execute("CREATE EXTENSION IF NOT EXISTS vector")
+        writer.execute(f"""
+        CREATE TABLE IF NOT EXISTS {TARGET_TABLE} (
+            uuid varchar(50) PRIMARY KEY,
+            embedding vector({dimension}) NOT NULL
+        )
+        """)
+        writer.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+        # A merged staging table is thrown away, so it can skip the WAL;
+        # a swapped one becomes the target and has to be logged
+        unlogged = 'UNLOGGED ' if mode == 'merge' else ''
+        writer.execute(f"""
+        CREATE {unlogged}TABLE {STAGING_TABLE} (
+            uuid varchar(50) NOT NULL,
+            embedding vector({dimension}) NOT NULL
+        )
+        """)
+
+    def comment_query(self, incremental: bool) -> str:
+        query = """
+        SELECT c.uuid, LEFT(c.text, %s)
+        FROM detrans_comments c
+        """
+        if incremental:
+            query += f"LEFT JOIN {TARGET_TABLE} e ON e.uuid = c.uuid\nWHERE e.uuid IS NULL AND "
+        else:
+            query += "WHERE "
+        return query + "c.text IS NOT NULL AND btrim(c.text) <> ''"
+
+    def load(self, mode: str = 'swap', incremental: bool = False, index: str = 'hnsw',
+             limit: Optional[int] = None, maintenance_work_mem: Optional[str] = None) -> bool:
+        """
+        Load embeddings into TARGET_TABLE. Returns False if a swap was
+        aborted because a batch failed; the target is then left unchanged.
+        """
+        if mode == 'swap' and limit:
+            raise ValueError("a limited load cannot be swapped in; use mode='merge'")
+
+        dimension = self.provider.dimension
+        if index != 'none' and dimension > MAX_INDEXED_DIMENSIONS:
+            print(f"⚠️  {dimension} dimensions is above pgvector's index limit "
+                  f"({MAX_INDEXED_DIMENSIONS}); skipping the index")
+            index = 'none'
+
+        started = time.time()
+        embed_seconds = 0.0
+        copy_seconds = 0.0
+        loaded = 0
+        skipped = 0
+
+        with self.source.connection() as reader_connection, self.source.connection() as writer_connection:
+            with writer_connection.cursor() as writer:
+                self.prepare(writer, mode, dimension)
+            writer_connection.commit()
+
+            query = self.comment_query(incremental)
+            if limit:
+                query += f" LIMIT {int(limit)}"
+
+            with reader_connection.cursor(name='comment_embeddings') as reader, \
+                    writer_connection.cursor() as writer:
+                reader.itersize = self.batch_size
+                reader.execute(query, (self.max_chars,))
+
+                while True:
+                    rows = reader.fetchmany(self.batch_size)
+                    if not rows:
+                        break
+
+                    batch_start = time.time()
+                    try:
+                        embeddings = np.asarray(self.provider.embed([text for _, text in rows]), dtype=np.float32)
+                    except Exception as e:
+                        if mode == 'swap':
+                            print(f"❌ Embedding batch failed: {e}")
+                            skipped += len(rows)
+                            break
+                        print(f"❌ Embedding batch failed, skipping {len(rows)} comments: {e}")
+                        skipped += len(rows)
+                        continue
+                    embed_seconds += time.time() - batch_start
+
+                    copy_start = time.time()
+                    writer.copy_expert(
+                        f"COPY {STAGING_TABLE} (uuid, embedding) FROM STDIN WITH (FORMAT binary)",
+                        encode_copy_batch([uuid for uuid, _ in rows], embeddings)
+                    )
+                    copy_seconds += time.time() - copy_start
+
+                    loaded += len(rows)
+                    elapsed = time.time() - started
+                    print(f"  {loaded} rows loaded ({loaded / elapsed:.1f} rows/s)")
+                    if self.provider.throttle_seconds:
+                        time.sleep(self.provider.throttle_seconds)
+
+            if mode == 'swap' and skipped:
+                # Swapping now would drop every embedding the batch did not reload
+                writer_connection.rollback()
+                with writer_connection.cursor() as writer:
+                    writer.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+                writer_connection.commit()
+                print(f"❌ Swap aborted after {loaded} staged rows; {TARGET_TABLE} is unchanged. "
+                      f"Re-run, or use --mode merge to keep partial loads")
+                return False
+
+            writer_connection.commit()
+            load_seconds = time.time() - started
+            print(f"📥 Staged {loaded} rows in {load_seconds:.1f}s "
+                  f"(embedding {embed_seconds:.1f}s, COPY {copy_seconds:.1f}s)")
+
+            index_start = time.time()
+            with writer_connection.cursor() as writer:
+                if maintenance_work_mem:
+                    writer.execute("SET maintenance_work_mem = %s", (maintenance_work_mem,))
+                if mode == 'swap':
+                    self.swap(writer, index, loaded)
+                else:
+                    self.merge(writer, index)
+            writer_connection.commit()
+            index_seconds = time.time() - index_start
+
+        total_seconds = time.time() - started
+        print(f"✅ {loaded} embeddings loaded into {TARGET_TABLE} ({mode}), {skipped} skipped")
+        print(f"📊 {loaded / total_seconds if total_seconds else 0:.1f} rows/s overall, "
+              f"{loaded / load_seconds if load_seconds else 0:.1f} rows/s while loading, "
+              f"{index_seconds:.1f}s for {mode} and indexing")
+        return True
+
+    def swap(self, writer, index: str, rows: int):
+        """Index the staging table, then replace the target with it in one transaction."""
+        writer.execute(f"ALTER TABLE {STAGING_TABLE} ADD PRIMARY KEY (uuid)")
+        statement = index_sql(STAGING_TABLE, index, rows)
+        if statement:
+            print(f"🔨 Building {index} index on {rows} rows...")
+            writer.execute(statement)
+        writer.execute(f"DROP TABLE IF EXISTS {TARGET_TABLE}")
+        writer.execute(f"ALTER TABLE {STAGING_TABLE} RENAME TO {TARGET_TABLE}")
+        writer.execute(f"ALTER INDEX {STAGING_TABLE}_pkey RENAME TO {TARGET_TABLE}_pkey")
+        if statement:
+            writer.execute(f"ALTER INDEX {STAGING_TABLE}_embedding_{index} RENAME TO {TARGET_TABLE}_embedding_{index}")
+
+    def merge(self, writer, index: str):
+        """Upsert the staged rows into the target, then build the index if it is missing."""
+        writer.execute(f"""
+        INSERT INTO {TARGET_TABLE} (uuid, embedding)
+        SELECT DISTINCT ON (uuid) uuid, embedding FROM {STAGING_TABLE}
+        ON CONFLICT (uuid) DO UPDATE SET embedding = EXCLUDED.embedding
+        """)
+        print(f"  Merged {writer.rowcount} rows")
+        writer.execute(f"DROP TABLE {STAGING_TABLE}")
+        writer.execute(f"SELECT COUNT(*) FROM {TARGET_TABLE}")
+        statement = index_sql(TARGET_TABLE, index, writer.fetchone()[0])
+        if statement:
+            writer.execute(statement)
+
+    def close(self):
+        self.source.close()
+
+
+def main():
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Bulk-load detrans_comments embeddings into pgvector")
+    parser.add_argument('--mode', choices=['swap', 'merge'],
+                        help="Replace the target table (swap, the default) or upsert into it (merge)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Only embed comments missing from the target (requires --mode merge)")
+    parser.add_argument('--index', choices=['hnsw', 'ivfflat', 'none'], default='hnsw',
+                        help="Vector index to build after the load (default: hnsw)")
+    parser.add_argument('--batch-size', type=int, default=500, help="Comments per embed/COPY batch (default: 500)")
+    parser.add_argument('--max-chars', type=int, default=8000, help="Truncate comment text to this many characters")
+    parser.add_argument('--limit', type=int, help="Only load this many comments (for trial runs; implies --mode merge)")
+    parser.add_argument('--maintenance-work-mem', help="maintenance_work_mem for the index build, e.g. 2GB")
+    parser.add_argument('--provider', choices=sorted(PROVIDERS), default='openai',
+                        help="Embedding backend (default: openai)")
+    parser.add_argument('--model', help="Model name for the provider (default: the provider's default)")
+    parser.add_argument('--threads', type=int, help="CPU threads for the local provider")
+    parser.add_argument('--embed-batch-size', type=int, default=64, help="Inference batch size for the local provider")
+    parser.add_argument('--backend', choices=['torch', 'onnx'], default='torch', help="Runtime for the local provider")
+    args = parser.parse_args()
+
+    if args.limit and args.mode == 'swap':
+        parser.error("--limit cannot be used with --mode swap: it would replace the table with a partial load")
+    if args.mode is None:
+        args.mode = 'merge' if args.limit else 'swap'
+    if args.incremental and args.mode != 'merge':
+        parser.error("--incremental requires --mode merge")
+
+    if args.provider == 'local':
+        provider = get_embedding_provider(
+            'local', model=args.model, threads=args.threads,
+            batch_size=args.embed_batch_size, backend=args.backend
+        )
+    else:
+        provider = get_embedding_provider(args.provider, model=args.model)
+    print(f"🚀 Using {provider.name} embeddings ({provider.dimension} dimensions)")
+
+    loader = CommentEmbeddingLoader(provider, batch_size=args.batch_size, max_chars=args.max_chars)
+    try:
+        ok = loader.load(
+            mode=args.mode,
+            incremental=args.incremental,
+            index=args.index,
+            limit=args.limit,
+            maintenance_work_mem=args.maintenance_work_mem
+        )
+    finally:
+        loader.close()
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
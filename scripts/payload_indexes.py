@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Payload indexes for the topic collections.
+
+dump_topics_to_json.py filters on is_synthetic and joins on topic_id, and
+the app filters on topic_id; without payload indexes Qdrant answers these
+filters by scanning every payload. This creates and verifies indexes on
+
+    is_synthetic    bool
+    topic_id        integer (keyword if the collection stores string ids)
+    question_count  integer
+
+for each collection, skipping fields its points do not have. With
+--benchmark the payloads are copied into a temporary collection and the
+filtered scroll/count latency is measured before and after indexing.
+
+Usage:
+    python payload_indexes.py
+    python payload_indexes.py --verify-only
+    python payload_indexes.py --benchmark --repeats 20
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from typing import Dict, List, Optional
+
+from qdrant_client import models
+
+from topic_vectors import COLLECTION, COLLECTION_WITH_VECTORS, connect_to_qdrant
+
+CATEGORY_COLLECTION = "default_topic_categories"
+TOPIC_COLLECTIONS = [COLLECTION, COLLECTION_WITH_VECTORS, CATEGORY_COLLECTION]
+
+PAYLOAD_INDEXES: Dict[str, models.PayloadSchemaType] = {
+    'is_synthetic': models.PayloadSchemaType.BOOL,
+    'topic_id': models.PayloadSchemaType.INTEGER,
+    'question_count': models.PayloadSchemaType.INTEGER,
+}
+
+NOT_SYNTHETIC = models.Filter(must=[
+    models.FieldCondition(key="is_synthetic", match=models.MatchValue(value=False))
+])
+
+
+def sample_payloads(client, collection_name: str, limit: int = 100) -> List[Dict]:
+    points, _ = client.scroll(collection_name=collection_name, limit=limit, with_payload=True, with_vectors=False)
+    return [point.payload or {} for point in points]
+
+
+def planned_indexes(client, collection_name: str) -> Dict[str, models.PayloadSchemaType]:
+    """Index types for the PAYLOAD_INDEXES fields present in the collection's points."""
+    payloads = sample_payloads(client, collection_name)
+    planned = {}
+    for field, schema in PAYLOAD_INDEXES.items():
+        values = [payload[field] for payload in payloads if payload.get(field) is not None]
+        if not values:
+            continue
+        if schema == models.PayloadSchemaType.INTEGER and isinstance(values[0], str):
+            schema = models.PayloadSchemaType.KEYWORD
+        planned[field] = schema
+    return planned
+
+
+def ensure_payload_indexes(client, collection_name: str) -> List[str]:
+    """Create any missing payload index; returns the fields that were (re)created."""
+    existing = client.get_collection(collection_name).payload_schema
+    created = []
+    for field, schema in planned_indexes(client, collection_name).items():
+        current = existing.get(field)
+        if current is not None and current.data_type == schema:
+            continue
+        if current is not None:
+            client.delete_payload_index(collection_name, field, wait=True)
+        client.create_payload_index(collection_name, field_name=field, field_schema=schema, wait=True)
+        created.append(field)
+    return created
+
+
+def verify_payload_indexes(client, collection_name: str) -> bool:
+    """Print the payload schema and check it has every planned index with the right type."""
+    schema = client.get_collection(collection_name).payload_schema
+    ok = True
+    for field, expected in planned_indexes(client, collection_name).items():
+        info = schema.get(field)
+        if info is None:
+            print(f"  ❌ {collection_name}.{field}: no index (expected {expected.value})")
+            ok = False
+        elif info.data_type != expected:
+            print(f"  ❌ {collection_name}.{field}: {info.data_type.value} index (expected {expected.value})")
+            ok = False
+        else:
+            print(f"  ✅ {collection_name}.{field}: {info.data_type.value}, {info.points or 0} points")
+    return ok
+
+
+def missing_indexes(client, collection_name: str, fields: List[str]) -> List[str]:
+    """Which of ``fields`` have no payload index on the collection."""
+    schema = client.get_collection(collection_name).payload_schema
+    return [field for field in fields if field not in schema]
+
+
+def benchmark_queries(payloads: List[Dict]) -> Dict[str, callable]:
+    """Filtered queries like the ones the dump script and the app run."""
+    topic_ids = [payload['topic_id'] for payload in payloads if payload.get('topic_id') is not None]
+    counts = sorted(payload['question_count'] for payload in payloads if payload.get('question_count') is not None)
+
+    queries = {
+        'scroll is_synthetic=false': lambda client, name: scroll_all(client, name, NOT_SYNTHETIC),
+        'count is_synthetic=false': lambda client, name: client.count(name, count_filter=NOT_SYNTHETIC, exact=True),
+    }
+    if topic_ids:
+        topic_filter = models.Filter(must=[
+            models.FieldCondition(key="topic_id", match=models.MatchValue(value=topic_ids[len(topic_ids) // 2]))
+        ])
+        queries['scroll topic_id=<id>'] = lambda client, name: scroll_all(client, name, topic_filter)
+    if counts:
+        range_filter = models.Filter(must=[
+            models.FieldCondition(key="question_count", range=models.Range(gte=counts[int(len(counts) * 0.9)]))
+        ])
+        queries['count question_count>=p90'] = lambda client, name: client.count(name, count_filter=range_filter, exact=True)
+    return queries
+
+
+def scroll_all(client, collection_name: str, scroll_filter: models.Filter, page_size: int = 1000) -> int:
+    offset = None
+    total = 0
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            scroll_filter=scroll_filter,
+            limit=page_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False
+        )
+        total += len(points)
+        if offset is None:
+            return total
+
+
+def time_queries(client, collection_name: str, queries: Dict[str, callable], repeats: int) -> Dict[str, float]:
+    """Median latency in ms of each query."""
+    timings = {}
+    for label, query in queries.items():
+        samples = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            query(client, collection_name)
+            samples.append((time.perf_counter() - start) * 1000)
+        timings[label] = statistics.median(samples)
+    return timings
+
+
+def run_benchmark(client, collection_name: str, repeats: int, keep: bool = False):
+    """
+    Copy the collection's payloads into a temporary collection and time the
+    filtered queries without and then with payload indexes.
+    """
+    bench_name = f"{collection_name}__bench_payload"
+    if client.collection_exists(bench_name):
+        client.delete_collection(bench_name)
+    client.create_collection(bench_name, vectors_config={})
+
+    payloads = []
+    offset = None
+    while True:
+        points, offset = client.scroll(collection_name=collection_name, limit=1000, offset=offset,
+                                       with_payload=True, with_vectors=False)
+        client.upsert(bench_name, points=[
+            models.PointStruct(id=point.id, vector={}, payload=point.payload) for point in points
+        ])
+        payloads.extend(point.payload or {} for point in points)
+        if offset is None:
+            break
+    print(f"\nBenchmarking {collection_name} ({len(payloads)} points, {repeats} repeats, median ms)")
+
+    queries = benchmark_queries(payloads)
+    without = time_queries(client, bench_name, queries, repeats)
+    ensure_payload_indexes(client, bench_name)
+    with_indexes = time_queries(client, bench_name, queries, repeats)
+
+    print(f"  {'query':<28} {'no index':>9} {'indexed':>9} {'speedup':>8}")
+    for label in queries:
+        speedup = without[label] / with_indexes[label] if with_indexes[label] else float('inf')
+        print(f"  {label:<28} {without[label]:>9.2f} {with_indexes[label]:>9.2f} {speedup:>7.1f}x")
+
+    if not keep:
+        client.delete_collection(bench_name)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Create and verify payload indexes on the topic collections")
+    parser.add_argument('--collections', nargs='+', default=TOPIC_COLLECTIONS,
+                        help=f"Collections to index (default: {' '.join(TOPIC_COLLECTIONS)})")
+    parser.add_argument('--verify-only', action='store_true', help="Only check the existing indexes")
+    parser.add_argument('--benchmark', action='store_true',
+                        help="Time filtered queries without and with indexes on a temporary copy")
+    parser.add_argument('--repeats', type=int, default=10, help="Runs per benchmark query (default: 10)")
+    parser.add_argument('--keep', action='store_true', help="Keep the temporary benchmark collections")
+    args = parser.parse_args(argv)
+
+    print("Connecting to Qdrant...")
+    client = connect_to_qdrant()
+
+    ok = True
+    for collection_name in args.collections:
+        if not client.collection_exists(collection_name):
+            print(f"⚠️  {collection_name} does not exist, skipping")
+            continue
+        if not args.verify_only:
+            created = ensure_payload_indexes(client, collection_name)
+            if created:
+                print(f"🔨 {collection_name}: created indexes on {', '.join(created)}")
+        ok = verify_payload_indexes(client, collection_name) and ok
+        if args.benchmark:
+            run_benchmark(client, collection_name, args.repeats, keep=args.keep)
+
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
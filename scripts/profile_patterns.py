@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Validate and profile the temporal regex catalogue used by generate_timelines.py.
+
+Every pattern in TEMPORAL_PATTERN_GROUPS is run over a sample corpus and
+reported with its time per MB, match count and match density, together with
+static lint findings (top-level alternation that escapes its \\b anchors,
+patterns that match a bare lowercase letter) and a backtracking probe that
+times the pattern on adversarial inputs of growing length.
+
+The time budget is relative: each pattern's time is divided by that of a
+trivial baseline pattern (BASELINE_PATTERN) on the same corpus, so the
+gate does not depend on how fast the machine running it is. The shipped
+catalogue peaks at about 6-8x the baseline. --budget-ms-per-mb sets an
+absolute budget instead.
+
+Exits non-zero when any pattern exceeds the time budget, shows super-linear
+growth, or fails lint, so it can gate CI as the catalogue grows.
+
+Usage:
+    python profile_patterns.py --source comments.jsonl --limit 20000
+    python profile_patterns.py --text sample.txt --budget-ratio 8
+    python profile_patterns.py --text sample.txt --budget-ms-per-mb 300
+    python profile_patterns.py --source comments.jsonl --json report.json
+"""
+
+import argparse
+import json
+import re
+import string
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from generate_timelines import COMPILED_PATTERN_GROUPS
+
+# Inputs that tend to trigger backtracking in patterns built from \s*, \d+
+# and large alternations; each is repeated to growing lengths
+ADVERSARIAL_UNITS = [
+    ' ',
+    '1',
+    'a',
+    '1 ',
+    'on ',
+    'trans ',
+    'the first ',
+    'years ',
+    'r/a',
+]
+PROBE_LENGTHS = (2_000, 8_000)
+PROBE_REPEATS = 3
+
+# A 4x longer probe taking more than this many times longer is treated as
+# super-linear (linear would be ~4x); probes faster than the floor are noise
+SUPERLINEAR_RATIO = 10.0
+PROBE_FLOOR_SECONDS = 0.005
+
+# Reference pattern for the relative time budget
+BASELINE_PATTERN = re.compile(r'\bthe\b', re.IGNORECASE)
+
+# Patterns and the baseline are timed best-of-N so their ratio is stable
+TIMING_REPEATS = 3
+
+
+def load_corpus(source_spec: Optional[str], text_paths: List[str], limit: Optional[int]) -> List[str]:
+    """Load sample texts from a comment source and/or plain text files."""
+    texts = []
+    for path in text_paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            texts.extend(line.strip() for line in f if line.strip())
+
+    if source_spec:
+        from comment_sources import open_comment_source
+
+        source = open_comment_source(source_spec)
+        try:
+            for record in source.iter_comments():
+                if record.get('text'):
+                    texts.append(record['text'])
+                if limit and len(texts) >= limit:
+                    break
+        finally:
+            source.close()
+
+    return texts[:limit] if limit else texts
+
+
+def top_level_alternation(pattern: str) -> bool:
+    """True if the pattern has a '|' outside any group, e.g. r'\\ba|b\\b'."""
+    depth = 0
+    in_class = False
+    escaped = False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif in_class:
+            if char == ']':
+                in_class = False
+        elif char == '[':
+            in_class = True
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return True
+    return False
+
+
+def lint_pattern(pattern: str, regex) -> List[str]:
+    """Static checks for patterns that are likely buggy."""
+    findings = []
+    if top_level_alternation(pattern):
+        findings.append("top-level '|' outside a group: anchors apply to only one branch")
+    letters = [letter for letter in string.ascii_lowercase if regex.fullmatch(letter)]
+    if letters:
+        findings.append(f"matches a bare lowercase letter ({', '.join(letters)}) under IGNORECASE")
+    return findings
+
+
+def backtracking_probe(regex) -> Dict[str, float]:
+    """
+    Time the pattern on adversarial strings of two lengths and return the
+    worst growth ratio between them.
+    """
+    worst_ratio = 0.0
+    worst_ms = 0.0
+    for unit in ADVERSARIAL_UNITS:
+        timings = []
+        for length in PROBE_LENGTHS:
+            text = unit * (length // len(unit))
+            best = float('inf')
+            for _ in range(PROBE_REPEATS):
+                start = time.perf_counter()
+                for _ in regex.finditer(text):
+                    pass
+                best = min(best, time.perf_counter() - start)
+            timings.append(best)
+        short, long = timings
+        worst_ms = max(worst_ms, long * 1000)
+        if long > PROBE_FLOOR_SECONDS:
+            worst_ratio = max(worst_ratio, long / max(short, 1e-6))
+    return {'growth_ratio': worst_ratio, 'worst_probe_ms': worst_ms}
+
+
+def time_pattern(regex, texts: List[str], repeats: int = TIMING_REPEATS) -> Tuple[float, int]:
+    """Best time in seconds to iterate every match over the corpus, and the match count."""
+    best = float('inf')
+    matches = 0
+    for _ in range(repeats):
+        matches = 0
+        start = time.perf_counter()
+        for text in texts:
+            for _ in regex.finditer(text):
+                matches += 1
+        best = min(best, time.perf_counter() - start)
+    return best, matches
+
+
+def baseline_ms_per_mb(texts: List[str], repeats: int = TIMING_REPEATS) -> float:
+    """Time per MB of BASELINE_PATTERN on the corpus."""
+    corpus_mb = sum(len(text.encode('utf-8')) for text in texts) / 1_000_000
+    if not corpus_mb:
+        return 0.0
+    seconds, _ = time_pattern(BASELINE_PATTERN, texts, repeats)
+    return seconds * 1000 / corpus_mb
+
+
+def profile_patterns(texts: List[str], probe: bool = True, baseline: Optional[float] = None,
+                     repeats: int = TIMING_REPEATS) -> List[Dict[str, any]]:
+    """
+    Run every catalogue pattern over the corpus and collect statistics.
+    ``baseline`` is the baseline pattern's ms/MB; each result's ``ratio``
+    is its ms/MB relative to it.
+    """
+    corpus_mb = sum(len(text.encode('utf-8')) for text in texts) / 1_000_000
+    results = []
+
+    for marker_type, compiled_patterns in COMPILED_PATTERN_GROUPS:
+        for pattern, regex in compiled_patterns:
+            elapsed, matches = time_pattern(regex, texts, repeats)
+
+            ms_per_mb = elapsed * 1000 / corpus_mb if corpus_mb else 0.0
+            result = {
+                'type': marker_type,
+                'pattern': pattern,
+                'seconds': elapsed,
+                'ms_per_mb': ms_per_mb,
+                'ratio': ms_per_mb / baseline if baseline else 0.0,
+                'matches': matches,
+                'matches_per_kb': matches / (corpus_mb * 1000) if corpus_mb else 0.0,
+                'lint': lint_pattern(pattern, regex),
+            }
+            if probe:
+                result.update(backtracking_probe(regex))
+            results.append(result)
+
+    return results
+
+
+def evaluate(results: List[Dict[str, any]], budget_ratio: float, max_matches_per_kb: float,
+             budget_ms_per_mb: Optional[float] = None) -> List[str]:
+    """
+    Return a failure message for every pattern that breaks a budget. The
+    time budget is ``budget_ms_per_mb`` when given, else ``budget_ratio``
+    times the baseline.
+    """
+    failures = []
+    for result in results:
+        label = f"[{result['type']}] {result['pattern'][:80]}"
+        if budget_ms_per_mb is not None:
+            if result['ms_per_mb'] > budget_ms_per_mb:
+                failures.append(f"{label}: {result['ms_per_mb']:.1f} ms/MB exceeds budget of {budget_ms_per_mb:.1f}")
+        elif result['ratio'] > budget_ratio:
+            failures.append(f"{label}: {result['ratio']:.1f}x baseline exceeds budget of {budget_ratio:.1f}x")
+        if result.get('growth_ratio', 0.0) > SUPERLINEAR_RATIO:
+            failures.append(f"{label}: super-linear on adversarial input (x{result['growth_ratio']:.1f} for 4x length)")
+        if result['matches_per_kb'] > max_matches_per_kb:
+            failures.append(f"{label}: {result['matches_per_kb']:.2f} matches/KB floods the output")
+        for finding in result['lint']:
+            failures.append(f"{label}: {finding}")
+    return failures
+
+
+def print_report(results: List[Dict[str, any]], texts: List[str], top: int, baseline: float):
+    corpus_mb = sum(len(text.encode('utf-8')) for text in texts) / 1_000_000
+    total_seconds = sum(result['seconds'] for result in results)
+    print(f"📊 {len(results)} patterns over {len(texts)} texts ({corpus_mb:.2f} MB)")
+    print(f"  Total regex time: {total_seconds:.2f}s ({total_seconds * 1000 / corpus_mb if corpus_mb else 0:.1f} ms/MB)")
+    print(f"  Baseline {BASELINE_PATTERN.pattern}: {baseline:.1f} ms/MB")
+
+    print(f"\n🐢 Slowest {top} patterns:")
+    for result in sorted(results, key=lambda r: r['seconds'], reverse=True)[:top]:
+        growth = f"  growth x{result['growth_ratio']:.1f}" if 'growth_ratio' in result else ''
+        print(f"  {result['ms_per_mb']:8.1f} ms/MB {result['ratio']:5.1f}x  {result['matches']:7d} matches{growth}  "
+              f"[{result['type']}] {result['pattern'][:90]}")
+
+    print(f"\n🔊 Noisiest {top} patterns:")
+    for result in sorted(results, key=lambda r: r['matches'], reverse=True)[:top]:
+        print(f"  {result['matches_per_kb']:8.2f} /KB  {result['matches']:7d} matches  "
+              f"[{result['type']}] {result['pattern'][:90]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the temporal regex catalogue")
+    parser.add_argument('--source', help="Comment source: 'postgres' or a .jsonl/.sqlite/.db/.parquet export")
+    parser.add_argument('--text', action='append', default=[], help="Plain text file, one sample per line")
+    parser.add_argument('--limit', type=int, default=20000, help="Maximum number of sample texts (default: 20000)")
+    parser.add_argument('--budget-ratio', type=float, default=12.0,
+                        help="Time budget per pattern as a multiple of the baseline pattern (default: 12)")
+    parser.add_argument('--budget-ms-per-mb', type=float,
+                        help="Absolute time budget per pattern; overrides --budget-ratio")
+    parser.add_argument('--max-matches-per-kb', type=float, default=5.0, help="Match density budget (default: 5)")
+    parser.add_argument('--repeats', type=int, default=TIMING_REPEATS,
+                        help=f"Timed runs per pattern, best is kept (default: {TIMING_REPEATS})")
+    parser.add_argument('--no-probe', action='store_true', help="Skip the adversarial backtracking probe")
+    parser.add_argument('--top', type=int, default=15, help="Rows to show in each ranking")
+    parser.add_argument('--json', help="Write the full report to this file")
+    args = parser.parse_args()
+
+    if not args.source and not args.text:
+        parser.error("give a --source or at least one --text file")
+
+    texts = load_corpus(args.source, args.text, args.limit)
+    if not texts:
+        print("❌ Sample corpus is empty")
+        sys.exit(1)
+
+    baseline = baseline_ms_per_mb(texts, args.repeats)
+    results = profile_patterns(texts, probe=not args.no_probe, baseline=baseline, repeats=args.repeats)
+    print_report(results, texts, args.top, baseline)
+
+    failures = evaluate(results, args.budget_ratio, args.max_matches_per_kb, args.budget_ms_per_mb)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'baseline_ms_per_mb': baseline, 'results': results, 'failures': failures}, f, indent=2)
+        print(f"\nReport written to {args.json}")
+
+    if failures:
+        print(f"\n❌ {len(failures)} pattern budget failures:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\n✅ All patterns within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Precompute the top-k related topics for every topic and store them in the
+Qdrant payload as ``related_topic_ids``.
+
+All vectors from default_topics_with_vectors are loaded into one matrix and
+neighbours are found with blocked matrix multiplies and argpartition, so the
+app can read related topics from the payload instead of running a vector
+search per request. The ids are written to the vector collection and to the
+source default_topics collection, which dump_topics_to_json.py reads.
+
+Each point also stores ``related_vector_hash``. With --incremental only
+points whose vector hash changed (and points that list a changed point as a
+neighbour) are recomputed; a full run is still needed now and then because a
+changed vector can also enter the neighbour lists of unchanged points.
+
+Usage:
+    python related_topics.py --k 10
+    python related_topics.py --k 10 --incremental
+"""
+
+import argparse
+import hashlib
+import time
+
+import numpy as np
+from qdrant_client import models
+
+from topic_vectors import COLLECTION, COLLECTION_WITH_VECTORS, connect_to_qdrant, load_vectors, top_k_neighbours
+
+
+def vector_hash(vector: np.ndarray) -> str:
+    """Short stable fingerprint of a vector."""
+    return hashlib.blake2b(vector.tobytes(), digest_size=8).hexdigest()
+
+
+def rows_to_update(ids, payloads, hashes, k):
+    """Rows whose stored neighbours are missing or stale."""
+    changed_ids = set()
+    rows = set()
+    for row, payload in enumerate(payloads):
+        if payload.get('related_vector_hash') != hashes[row] or len(payload.get('related_topic_ids', [])) != k:
+            rows.add(row)
+            changed_ids.add(payload.get('topic_id', ids[row]))
+
+    # Points that list a changed topic as a neighbour may now have stale scores
+    for row, payload in enumerate(payloads):
+        if changed_ids.intersection(payload.get('related_topic_ids', [])):
+            rows.add(row)
+    return np.array(sorted(rows), dtype=np.int64)
+
+
+def write_related_payloads(client, collection_name, point_payloads, batch_size):
+    """Write per-point payloads with batched set_payload operations."""
+    operations = [
+        models.SetPayloadOperation(set_payload=models.SetPayload(payload=payload, points=[point_id]))
+        for point_id, payload in point_payloads
+    ]
+    for start in range(0, len(operations), batch_size):
+        client.batch_update_points(
+            collection_name=collection_name,
+            update_operations=operations[start:start + batch_size],
+            wait=True
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute related topics into the Qdrant payload")
+    parser.add_argument('--k', type=int, default=10, help="Related topics per topic (default: 10)")
+    parser.add_argument('--incremental', action='store_true', help="Only recompute points whose vectors changed")
+    parser.add_argument('--block-size', type=int, default=512, help="Query rows per matrix multiply (default: 512)")
+    parser.add_argument('--batch-size', type=int, default=256, help="set_payload operations per request (default: 256)")
+    parser.add_argument('--skip-source', action='store_true', help=f"Do not copy the ids to {COLLECTION}")
+    args = parser.parse_args()
+
+    print("Connecting to Qdrant...")
+    client = connect_to_qdrant()
+    ids, payloads, matrix = load_vectors(client, COLLECTION_WITH_VECTORS)
+    if not ids:
+        print("No vectors found")
+        return
+
+    hashes = [vector_hash(row) for row in matrix]
+    if args.incremental:
+        query_rows = rows_to_update(ids, payloads, hashes, min(args.k, len(ids) - 1))
+        print(f"{len(query_rows)} of {len(ids)} topics need new neighbours")
+        if not len(query_rows):
+            return
+    else:
+        query_rows = np.arange(len(ids))
+
+    start_time = time.time()
+    neighbours, _ = top_k_neighbours(matrix, args.k, query_rows, args.block_size)
+    print(f"Computed top-{args.k} neighbours for {len(query_rows)} topics in {time.time() - start_time:.1f}s")
+
+    topic_ids = [payload.get('topic_id', point_id) for point_id, payload in zip(ids, payloads)]
+    point_payloads = []
+    for row, neighbour_rows in zip(query_rows, neighbours):
+        point_payloads.append((ids[row], {
+            'related_topic_ids': [topic_ids[n] for n in neighbour_rows],
+            'related_vector_hash': hashes[row],
+        }))
+
+    start_time = time.time()
+    collections = [COLLECTION_WITH_VECTORS] if args.skip_source else [COLLECTION_WITH_VECTORS, COLLECTION]
+    for collection_name in collections:
+        write_related_payloads(client, collection_name, point_payloads, args.batch_size)
+        print(f"Updated related_topic_ids on {len(point_payloads)} points in {collection_name}")
+    print(f"Payload writes took {time.time() - start_time:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
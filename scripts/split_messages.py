@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Split messages/<locale>.json into per-namespace minified chunks.
+
+For every locale each top-level namespace ("home", "chat", "videos", ...) is
+written as a minified JSON file, and a manifest maps each route under
+app/[locale] to the namespaces its page, layouts and imported components
+ask for through useTranslations/getTranslations. A route can then load just
+its own chunks instead of the whole locale file.
+
+The tool also checks that every locale has the same key set as en.json and
+reports bundle sizes per locale.
+
+Usage:
+    python scripts/split_messages.py                  # write public/messages
+    python scripts/split_messages.py --check --strict # validate only, fail on key drift
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import os
+import re
+import sys
+from typing import Dict, List, Set
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MESSAGES_DIR = os.path.join(REPO_ROOT, 'messages')
+ROUTES_DIR = os.path.join(REPO_ROOT, 'app', '[locale]')
+DEFAULT_OUT = os.path.join(REPO_ROOT, 'public', 'messages')
+SOURCE_LOCALE = 'en'
+
+# Marker for "needs every namespace", e.g. useTranslations() with no argument
+ALL_NAMESPACES = '*'
+
+IMPORT_RE = re.compile(r'''(?:import|export)\s+(?:[\w*{}\s,]+\s+from\s+)?['"]([^'"]+)['"]|import\(\s*['"]([^'"]+)['"]\s*\)''')
+NAMESPACE_RE = re.compile(r'''(?:useTranslations|getTranslations)\(\s*['"]([^'"]+)['"]|namespace:\s*['"]([^'"]+)['"]''')
+NO_NAMESPACE_RE = re.compile(r'''(?:useTranslations|getTranslations)\(\s*\)|getTranslations\(\s*\{(?:(?!namespace)[^}])*\}\s*\)''')
+# With no namespace, keys are full paths: t("theme.title")
+ROOT_KEY_RE = re.compile(r'''\bt\(\s*['"]([\w-]+)\.''')
+SOURCE_EXTENSIONS = ['.tsx', '.ts', '.jsx', '.js', '/index.tsx', '/index.ts']
+
+
+def minify(data) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def flatten_keys(messages: Dict, prefix: str = '') -> Set[str]:
+    keys = set()
+    for key, value in messages.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            keys |= flatten_keys(value, path)
+        else:
+            keys.add(path)
+    return keys
+
+
+def resolve_import(specifier: str, importer: str):
+    """Resolve a local import to a file path, or None for packages."""
+    if specifier.startswith('@/'):
+        base = os.path.join(REPO_ROOT, specifier[2:])
+    elif specifier.startswith('.'):
+        base = os.path.normpath(os.path.join(os.path.dirname(importer), specifier))
+    else:
+        return None
+
+    if os.path.isfile(base):
+        return base
+    for extension in SOURCE_EXTENSIONS:
+        if os.path.isfile(base + extension):
+            return base + extension
+    return None
+
+
+def namespaces_for(entry_files: List[str], cache: Dict[str, Set[str]]) -> Set[str]:
+    """Top-level namespaces used by the entry files and everything they import."""
+    namespaces = set()
+    seen = set()
+    stack = list(entry_files)
+    while stack:
+        path = stack.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+
+        if path not in cache:
+            with open(path, 'r', encoding='utf-8') as f:
+                source = f.read()
+            found = set()
+            for match in NAMESPACE_RE.finditer(source):
+                found.add((match.group(1) or match.group(2)).split('.')[0])
+            if NO_NAMESPACE_RE.search(source):
+                root_keys = {match.group(1) for match in ROOT_KEY_RE.finditer(source)}
+                # Fall back to everything when keys are built dynamically
+                found |= root_keys or {ALL_NAMESPACES}
+            imports = set()
+            for match in IMPORT_RE.finditer(source):
+                resolved = resolve_import(match.group(1) or match.group(2), path)
+                if resolved:
+                    imports.add(resolved)
+            cache[path] = (found, imports)
+
+        found, imports = cache[path]
+        namespaces |= found
+        stack.extend(imports)
+    return namespaces
+
+
+def route_manifest(all_namespaces: List[str]) -> Dict[str, List[str]]:
+    """Map each route under app/[locale] to the namespaces it needs."""
+    cache = {}
+    root_layouts = [
+        path for path in (os.path.join(REPO_ROOT, 'app', 'layout.tsx'), os.path.join(ROUTES_DIR, 'layout.tsx'))
+        if os.path.isfile(path)
+    ]
+    routes = {}
+    for page in sorted(glob.glob(os.path.join(glob.escape(ROUTES_DIR), '**', 'page.tsx'), recursive=True)):
+        route_dir = os.path.dirname(page)
+        relative = os.path.relpath(route_dir, ROUTES_DIR)
+        route = '/' if relative == '.' else '/' + relative.replace(os.sep, '/')
+
+        # Layouts between app/[locale] and the page wrap it too
+        entries = [page] + list(root_layouts)
+        directory = route_dir
+        while directory != ROUTES_DIR and directory.startswith(ROUTES_DIR):
+            layout = os.path.join(directory, 'layout.tsx')
+            if os.path.isfile(layout):
+                entries.append(layout)
+            directory = os.path.dirname(directory)
+
+        namespaces = namespaces_for(entries, cache)
+        if ALL_NAMESPACES in namespaces:
+            namespaces = set(all_namespaces)
+        routes[route] = sorted(namespace for namespace in namespaces if namespace in all_namespaces)
+    return routes
+
+
+def validate_keys(locales: Dict[str, Dict]) -> Dict[str, Dict[str, List[str]]]:
+    """Keys each locale is missing or has in addition to en.json."""
+    source_keys = flatten_keys(locales[SOURCE_LOCALE])
+    problems = {}
+    for locale, messages in locales.items():
+        keys = flatten_keys(messages)
+        missing = sorted(source_keys - keys)
+        extra = sorted(keys - source_keys)
+        if missing or extra:
+            problems[locale] = {'missing': missing, 'extra': extra}
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Split locale messages into per-namespace chunks")
+    parser.add_argument('--out', default=DEFAULT_OUT, help="Output directory (default: public/messages)")
+    parser.add_argument('--check', action='store_true', help="Validate and report only, write nothing")
+    parser.add_argument('--strict', action='store_true', help="Exit non-zero if any locale's keys differ from en")
+    args = parser.parse_args()
+
+    locales = {}
+    for path in sorted(glob.glob(os.path.join(MESSAGES_DIR, '*.json'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            locales[os.path.splitext(os.path.basename(path))[0]] = json.load(f)
+
+    all_namespaces = list(locales[SOURCE_LOCALE])
+    routes = route_manifest(all_namespaces)
+
+    sizes = {}
+    for locale, messages in locales.items():
+        chunks = {namespace: minify(value) for namespace, value in messages.items()}
+        chunk_bytes = {namespace: len(chunk.encode('utf-8')) for namespace, chunk in chunks.items()}
+        full = minify(messages).encode('utf-8')
+        route_bytes = [sum(chunk_bytes.get(namespace, 0) for namespace in needed) for needed in routes.values()]
+        sizes[locale] = {
+            'source_bytes': os.path.getsize(os.path.join(MESSAGES_DIR, f'{locale}.json')),
+            'minified_bytes': len(full),
+            'gzip_bytes': len(gzip.compress(full)),
+            'largest_route_bytes': max(route_bytes) if route_bytes else 0,
+            'average_route_bytes': sum(route_bytes) // len(route_bytes) if route_bytes else 0,
+            'namespaces': chunk_bytes,
+        }
+
+        if not args.check:
+            locale_dir = os.path.join(args.out, locale)
+            os.makedirs(locale_dir, exist_ok=True)
+            for namespace, chunk in chunks.items():
+                with open(os.path.join(locale_dir, f'{namespace}.json'), 'w', encoding='utf-8') as f:
+                    f.write(chunk)
+
+    if not args.check:
+        os.makedirs(args.out, exist_ok=True)
+        with open(os.path.join(args.out, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump({
+                'namespaces': all_namespaces,
+                'routes': routes,
+                'locales': {locale: size['namespaces'] for locale, size in sizes.items()},
+            }, f, indent=2)
+            f.write('\n')
+        print(f"Wrote {len(all_namespaces)} namespaces x {len(locales)} locales to {args.out}")
+
+    print(f"\nRoutes ({len(routes)}):")
+    for route, namespaces in routes.items():
+        print(f"  {route:<22} {', '.join(namespaces)}")
+
+    print(f"\n  {'locale':<8} {'source':>9} {'minified':>9} {'gzip':>8} {'avg route':>10} {'max route':>10}")
+    for locale, size in sizes.items():
+        print(f"  {locale:<8} {size['source_bytes']:>9} {size['minified_bytes']:>9} {size['gzip_bytes']:>8} "
+              f"{size['average_route_bytes']:>10} {size['largest_route_bytes']:>10}")
+
+    problems = validate_keys(locales)
+    if problems:
+        print(f"\n{len(problems)} locales differ from {SOURCE_LOCALE}.json:")
+        for locale, problem in problems.items():
+            print(f"  {locale}: {len(problem['missing'])} missing, {len(problem['extra'])} extra")
+            for key in problem['missing'][:5]:
+                print(f"    - {key}")
+            for key in problem['extra'][:5]:
+                print(f"    + {key}")
+        if args.strict:
+            sys.exit(1)
+    else:
+        print(f"\nAll locales have the same keys as {SOURCE_LOCALE}.json")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Incremental translation sync for messages/*.json.
+
+en.json is flattened into dotted key paths ("home.aboutDetransition.title")
+and every source string is hashed. A manifest records, per locale, the hash
+of the English string each translation was made from, so a sync only sends
+keys that are missing from a locale or whose English text changed since it
+was translated.
+
+Commands:
+    init     record the current state as translated (run once)
+    status   count missing, stale and obsolete keys per locale
+    export   write translation batches of missing/stale keys per locale
+    merge    merge translated batches back into the locale files
+
+Usage:
+    python scripts/sync_translations.py init
+    python scripts/sync_translations.py status
+    python scripts/sync_translations.py export --out translation-jobs --batch-size 100
+    python scripts/sync_translations.py merge --jobs translation-jobs
+
+Batch files look like {"locale": "de", "strings": {key: text}, "hashes": {key: hash}}.
+Translate the values of "strings" in place and run merge; only those keys
+are written, every other key and the file layout stay as they are.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+from typing import Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MESSAGES_DIR = os.path.join(REPO_ROOT, 'messages')
+MANIFEST_PATH = os.path.join(MESSAGES_DIR, '.translation-manifest.json')
+SOURCE_LOCALE = 'en'
+
+
+def load_json(path: str) -> Dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_json(path: str, data: Dict):
+    """Write in the same layout as the existing message files."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(data, indent=2, ensure_ascii=False) + '\n')
+
+
+def flatten(messages: Dict, prefix: str = '') -> Dict[str, str]:
+    """Flatten nested messages into {"a.b.c": "text"}, preserving order."""
+    flat = {}
+    for key, value in messages.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        else:
+            flat[path] = value
+    return flat
+
+
+def source_hash(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]
+
+
+def locale_files() -> Dict[str, str]:
+    """Map locale -> path for every translated locale file."""
+    return {
+        os.path.splitext(os.path.basename(path))[0]: path
+        for path in sorted(glob.glob(os.path.join(MESSAGES_DIR, '*.json')))
+        if os.path.splitext(os.path.basename(path))[0] != SOURCE_LOCALE
+    }
+
+
+def load_manifest() -> Dict:
+    if os.path.exists(MANIFEST_PATH):
+        return load_json(MANIFEST_PATH)
+    return {'source': SOURCE_LOCALE, 'locales': {}}
+
+
+def diff_locale(source: Dict[str, str], target: Dict[str, str], hashes: Dict[str, str]) -> Dict[str, List[str]]:
+    """Classify keys of one locale against the source strings."""
+    missing, stale = [], []
+    for key, text in source.items():
+        if key not in target:
+            missing.append(key)
+        elif hashes.get(key) != source_hash(text):
+            stale.append(key)
+    obsolete = [key for key in target if key not in source]
+    return {'missing': missing, 'stale': stale, 'obsolete': obsolete}
+
+
+def set_path(messages: Dict, path: str, value: str, reference: Dict):
+    """
+    Set a dotted key, creating parent objects as needed. A key that is new
+    to its object is inserted where it sits in the source file; existing
+    keys are updated in place and never moved.
+    """
+    parts = path.split('.')
+    node, ref = messages, reference
+    for part in parts[:-1]:
+        child_ref = ref.get(part, {}) if isinstance(ref, dict) else {}
+        if not isinstance(node.get(part), dict):
+            _insert_like(node, part, {}, ref)
+        node, ref = node[part], child_ref
+
+    _insert_like(node, parts[-1], value, ref)
+
+
+def _insert_like(node: Dict, key: str, value, reference: Dict):
+    """
+    Set ``node[key]``. A new key goes right after the closest key that
+    precedes it in ``reference`` and exists in ``node``, or first if there
+    is none; the order of every other key is left alone.
+    """
+    if key in node or not isinstance(reference, dict) or key not in reference:
+        node[key] = value
+        return
+
+    anchor = None
+    for ref_key in reference:
+        if ref_key == key:
+            break
+        if ref_key in node:
+            anchor = ref_key
+
+    items = list(node.items())
+    position = 0 if anchor is None else [k for k, _ in items].index(anchor) + 1
+    items.insert(position, (key, value))
+    node.clear()
+    node.update(items)
+
+
+def cmd_init(args):
+    source = flatten(load_json(os.path.join(MESSAGES_DIR, f'{SOURCE_LOCALE}.json')))
+    manifest = {'source': SOURCE_LOCALE, 'locales': {}}
+    for locale, path in locale_files().items():
+        target = flatten(load_json(path))
+        manifest['locales'][locale] = {key: source_hash(text) for key, text in source.items() if key in target}
+    write_json(MANIFEST_PATH, manifest)
+    print(f"Manifest written for {len(manifest['locales'])} locales ({len(source)} source keys)")
+
+
+def cmd_status(args):
+    source = flatten(load_json(os.path.join(MESSAGES_DIR, f'{SOURCE_LOCALE}.json')))
+    manifest = load_manifest()
+    print(f"{len(source)} source keys in {SOURCE_LOCALE}.json")
+    print(f"  {'locale':<8} {'missing':>8} {'stale':>8} {'obsolete':>9}")
+    for locale, path in locale_files().items():
+        if args.locales and locale not in args.locales:
+            continue
+        diff = diff_locale(source, flatten(load_json(path)), manifest['locales'].get(locale, {}))
+        print(f"  {locale:<8} {len(diff['missing']):>8} {len(diff['stale']):>8} {len(diff['obsolete']):>9}")
+
+
+def cmd_export(args):
+    source = flatten(load_json(os.path.join(MESSAGES_DIR, f'{SOURCE_LOCALE}.json')))
+    manifest = load_manifest()
+    total_keys = 0
+    total_batches = 0
+
+    for locale, path in locale_files().items():
+        if args.locales and locale not in args.locales:
+            continue
+        diff = diff_locale(source, flatten(load_json(path)), manifest['locales'].get(locale, {}))
+        keys = diff['missing'] + diff['stale']
+        if not keys:
+            continue
+
+        locale_dir = os.path.join(args.out, locale)
+        os.makedirs(locale_dir, exist_ok=True)
+        for batch_number, start in enumerate(range(0, len(keys), args.batch_size), 1):
+            batch = keys[start:start + args.batch_size]
+            write_json(os.path.join(locale_dir, f'batch-{batch_number:03d}.json'), {
+                'locale': locale,
+                'strings': {key: source[key] for key in batch},
+                'hashes': {key: source_hash(source[key]) for key in batch},
+            })
+            total_batches += 1
+        total_keys += len(keys)
+        print(f"  {locale}: {len(diff['missing'])} missing, {len(diff['stale'])} stale")
+
+    print(f"Exported {total_keys} keys in {total_batches} batches to {args.out}")
+
+
+def cmd_merge(args):
+    reference = load_json(os.path.join(MESSAGES_DIR, f'{SOURCE_LOCALE}.json'))
+    manifest = load_manifest()
+    files = locale_files()
+
+    batches_by_locale: Dict[str, List[Dict]] = {}
+    for path in sorted(glob.glob(os.path.join(args.jobs, '*', '*.json'))):
+        batch = load_json(path)
+        batches_by_locale.setdefault(batch['locale'], []).append(batch)
+
+    for locale, batches in batches_by_locale.items():
+        if args.locales and locale not in args.locales:
+            continue
+        if locale not in files:
+            print(f"  Skipping unknown locale {locale}")
+            continue
+
+        messages = load_json(files[locale])
+        hashes = manifest['locales'].setdefault(locale, {})
+        merged = 0
+        for batch in batches:
+            for key, text in batch['strings'].items():
+                set_path(messages, key, text, reference)
+                hashes[key] = batch['hashes'][key]
+                merged += 1
+        write_json(files[locale], messages)
+        print(f"  {locale}: merged {merged} keys")
+
+    write_json(MANIFEST_PATH, manifest)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental translation sync for messages/*.json")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    init = subparsers.add_parser('init', help="Record the current translations as up to date")
+    init.set_defaults(func=cmd_init)
+
+    status = subparsers.add_parser('status', help="Show missing, stale and obsolete keys per locale")
+    status.add_argument('--locales', nargs='*', help="Only these locales")
+    status.set_defaults(func=cmd_status)
+
+    export = subparsers.add_parser('export', help="Write batches of keys that need translating")
+    export.add_argument('--out', default='translation-jobs', help="Output directory (default: translation-jobs)")
+    export.add_argument('--batch-size', type=int, default=100, help="Keys per batch file (default: 100)")
+    export.add_argument('--locales', nargs='*', help="Only these locales")
+    export.set_defaults(func=cmd_export)
+
+    merge = subparsers.add_parser('merge', help="Merge translated batches into the locale files")
+    merge.add_argument('--jobs', default='translation-jobs', help="Directory of translated batches")
+    merge.add_argument('--locales', nargs='*', help="Only these locales")
+    merge.set_defaults(func=cmd_merge)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
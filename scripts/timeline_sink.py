@@ -0,0 +1,144 @@
+"""
+Publish per-user timeline summaries to Redis for the app.
+
+Each processed user is reduced to a compact JSON summary: marker counts by
+type, the ages they mention, and their markers as an ordered event list.
+Summaries are written with pipelined bulk writes under versioned keys
+that belong to one run:
+
+    timeline:run:<run_id>:user:<username>   JSON summary
+    timeline:run:<run_id>:meta              hash: users, started_at, published_at
+    timeline:current                        run_id readers should use
+
+A run becomes visible only when ``publish`` swaps ``timeline:current`` to
+it in one command, so readers never see a half-written run. The previous
+run's keys are given a short TTL rather than deleted, so reads already in
+flight still resolve. Readers resolve ``timeline:current`` first, then
+read the user key of that run.
+
+redis.conf evicts with allkeys-lru, so readers must treat a missing
+summary as a cache miss.
+"""
+
+import json
+import os
+import time
+import uuid
+from collections import Counter
+from typing import Dict, Optional
+
+KEY_PREFIX = 'timeline'
+CURRENT_KEY = f'{KEY_PREFIX}:current'
+
+# How long the replaced run stays readable after a swap
+PREVIOUS_RUN_TTL_SECONDS = 3600
+
+
+def run_key(run_id: str, suffix: str) -> str:
+    return f'{KEY_PREFIX}:run:{run_id}:{suffix}'
+
+
+def summarize_timeline(result: Dict[str, any], max_events: int = 200) -> Dict[str, any]:
+    """Reduce a process_user_comments result to what a profile page needs."""
+    markers = sorted(result['temporal_markers'], key=lambda marker: marker['start_char'])
+
+    events = []
+    previous = None
+    for marker in markers:
+        key = (marker['type'], marker['value'])
+        # The same marker is often matched by several patterns in a row
+        if key == previous:
+            continue
+        previous = key
+        events.append({
+            'type': marker['type'],
+            'value': marker['value'],
+            'text': marker['match_text'],
+            'offset': marker['start_char'],
+        })
+
+    ages = Counter(marker['value'] for marker in markers if marker['type'] == 'age')
+    return {
+        'username': result['username'],
+        'marker_counts': dict(Counter(marker['type'] for marker in markers)),
+        'ages': sorted(ages),
+        'most_mentioned_age': ages.most_common(1)[0][0] if ages else None,
+        'events': events[:max_events],
+        'event_count': len(events),
+        'total_sentences': result['total_sentences'],
+        'temporal_sentence_count': result['temporal_sentence_count'],
+    }
+
+
+class RedisTimelineSink:
+    """Buffers summaries into pipelines and publishes them as one versioned run."""
+
+    def __init__(self, url: Optional[str] = None, run_id: Optional[str] = None, batch_size: int = 500):
+        import redis
+
+        self.client = redis.Redis.from_url(url or os.getenv('REDIS_URL', 'redis://localhost:6379'))
+        # The random suffix keeps runs started in the same second apart
+        self.run_id = run_id or f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.batch_size = batch_size
+        self.users = 0
+        self.started_at = time.time()
+        self._pipeline = self.client.pipeline(transaction=False)
+        self._pending = 0
+
+    def add(self, result: Dict[str, any]):
+        """Queue one user's summary; the pipeline is flushed every ``batch_size`` users."""
+        summary = summarize_timeline(result)
+        self._pipeline.set(
+            run_key(self.run_id, f"user:{result['username']}"),
+            json.dumps(summary, ensure_ascii=False, separators=(',', ':'))
+        )
+        self.users += 1
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self._pipeline.execute()
+            self._pending = 0
+
+    def publish(self) -> Optional[str]:
+        """
+        Make this run the current one and expire the run it replaces.
+        Returns the previous run id, if any.
+        """
+        self.flush()
+        self.client.hset(run_key(self.run_id, 'meta'), mapping={
+            'users': self.users,
+            'started_at': int(self.started_at),
+            'published_at': int(time.time()),
+        })
+
+        # SET ... GET swaps the pointer and returns the old value atomically
+        previous = self.client.set(CURRENT_KEY, self.run_id, get=True)
+        previous = previous.decode() if isinstance(previous, bytes) else previous
+        if previous and previous != self.run_id:
+            self._expire_run(previous, PREVIOUS_RUN_TTL_SECONDS)
+        print(f"✅ Published {self.users} timelines to Redis as run {self.run_id}"
+              + (f" (replacing {previous})" if previous else ""))
+        return previous
+
+    def discard(self):
+        """Drop the keys of this (unpublished) run."""
+        self._pipeline.reset()
+        self._expire_run(self.run_id, 0)
+        print(f"🗑️  Discarded Redis run {self.run_id}")
+
+    def _expire_run(self, run_id: str, ttl: int):
+        pipeline = self.client.pipeline(transaction=False)
+        for count, key in enumerate(self.client.scan_iter(match=run_key(run_id, '*'), count=1000), 1):
+            if ttl:
+                pipeline.expire(key, ttl)
+            else:
+                pipeline.delete(key)
+            if count % self.batch_size == 0:
+                pipeline.execute()
+        pipeline.execute()
+
+    def close(self):
+        self.client.close()
@@ -0,0 +1,160 @@
+"""
+Helpers for bulk work over the topic embedding collection.
+
+Loads every point of a Qdrant collection into one float32 NumPy matrix and
+provides blocked similarity routines, so batch jobs run as a handful of
+matrix multiplies instead of one vector search per topic.
+"""
+
+import os
+import time
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+from qdrant_client import QdrantClient
+
+COLLECTION = "default_topics"
+COLLECTION_WITH_VECTORS = "default_topics_with_vectors"
+
+
+def connect_to_qdrant() -> QdrantClient:
+    """Connect to Qdrant instance"""
+    url = os.getenv("QDRANT_URL", "http://localhost:6333")
+    return QdrantClient(url=url)
+
+
+def load_vectors(client: QdrantClient, collection_name: str = COLLECTION_WITH_VECTORS,
+                 batch_size: int = 1000) -> Tuple[List, List[Dict], np.ndarray]:
+    """
+    Scroll a whole collection with vectors.
+
+    Returns point ids, payloads and an (n, dim) float32 matrix of unit-length
+    rows, so a dot product is the cosine similarity.
+    """
+    ids = []
+    payloads = []
+    vectors = []
+    offset = None
+    start_time = time.time()
+
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            with_vectors=True,
+            with_payload=True,
+            limit=batch_size,
+            offset=offset
+        )
+        for point in points:
+            if point.vector is None:
+                continue
+            ids.append(point.id)
+            payloads.append(point.payload or {})
+            vectors.append(point.vector)
+        if offset is None:
+            break
+
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if len(matrix):
+        matrix = normalize_rows(matrix)
+    print(f"Loaded {len(ids)} vectors from {collection_name} in {time.time() - start_time:.1f}s")
+    return ids, payloads, matrix
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Scale every row to unit length (zero rows are left as zeros)."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+def similar_pairs(matrix: np.ndarray, threshold: float,
+                  block_size: int = 2048) -> Iterator[Tuple[int, int, float]]:
+    """
+    Yield (i, j, similarity) for every pair i < j with cosine >= threshold.
+
+    The similarity matrix is computed block by block, so memory stays at
+    block_size x block_size floats regardless of collection size.
+    """
+    n = len(matrix)
+    for row_start in range(0, n, block_size):
+        row_end = min(row_start + block_size, n)
+        rows = matrix[row_start:row_end]
+        for col_start in range(row_start, n, block_size):
+            col_end = min(col_start + block_size, n)
+            similarities = rows @ matrix[col_start:col_end].T
+            hits = similarities >= threshold
+
+            if col_start == row_start:
+                # Diagonal block: keep only the strict upper triangle, so
+                # self-pairs and mirrored pairs are never reported
+                hits &= np.triu(np.ones(hits.shape, dtype=bool), k=1)
+
+            row_idx, col_idx = np.nonzero(hits)
+            for i, j in zip(row_idx, col_idx):
+                yield row_start + int(i), col_start + int(j), float(similarities[i, j])
+
+
+class UnionFind:
+    """Disjoint-set forest with path halving and union by size."""
+
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def find(self, item: int) -> int:
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a: int, b: int) -> bool:
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return False
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        return True
+
+    def groups(self) -> Dict[int, List[int]]:
+        """Map each root to the members of its set."""
+        groups: Dict[int, List[int]] = {}
+        for item in range(len(self.parent)):
+            groups.setdefault(self.find(item), []).append(item)
+        return groups
+
+
+def top_k_neighbours(matrix: np.ndarray, k: int, query_rows: np.ndarray = None,
+                     block_size: int = 512) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Find the k most similar rows of ``matrix`` for each row in ``query_rows``
+    (all rows by default), excluding the row itself.
+
+    Returns (indices, scores), both shaped (len(query_rows), k) and sorted by
+    descending similarity. Each block of queries costs one matrix multiply
+    and one argpartition, with block_size x n floats in memory.
+    """
+    n = len(matrix)
+    if query_rows is None:
+        query_rows = np.arange(n)
+    k = max(0, min(k, n - 1))
+    indices = np.empty((len(query_rows), k), dtype=np.int64)
+    scores = np.empty((len(query_rows), k), dtype=np.float32)
+    if k <= 0:
+        return indices, scores
+
+    for start in range(0, len(query_rows), block_size):
+        rows = query_rows[start:start + block_size]
+        similarities = matrix[rows] @ matrix.T
+        similarities[np.arange(len(rows)), rows] = -np.inf
+
+        candidates = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        candidate_scores = np.take_along_axis(similarities, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1)
+
+        indices[start:start + len(rows)] = np.take_along_axis(candidates, order, axis=1)
+        scores[start:start + len(rows)] = np.take_along_axis(candidate_scores, order, axis=1)
+
+    return indices, scores
@@ -0,0 +1,90 @@
+"""
+Storage profiles for the topic vector collection.
+
+A profile bundles the Qdrant settings that trade memory for search quality:
+quantization (scalar int8 or binary, kept in RAM), whether the original
+float32 vectors live on disk, HNSW graph parameters, and the search-time
+parameters (rescoring with oversampling) that go with them.
+
+    memory  float32 vectors in RAM, no quantization (the original setup)
+    scalar  int8 quantized copy in RAM, originals on disk, rescored (~4x less RAM)
+    binary  1-bit quantized copy in RAM, originals on disk, rescored (~32x less RAM)
+"""
+
+from typing import Dict
+
+from qdrant_client import models
+
+STORAGE_PROFILES: Dict[str, Dict] = {
+    'memory': {
+        'on_disk': False,
+        'quantization': None,
+        'hnsw': models.HnswConfigDiff(m=16, ef_construct=100),
+        'search': models.SearchParams(hnsw_ef=128),
+        'bytes_per_dim': 4.0,
+    },
+    'scalar': {
+        'on_disk': True,
+        'quantization': models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=0.99,
+                always_ram=True
+            )
+        ),
+        'hnsw': models.HnswConfigDiff(m=16, ef_construct=100, on_disk=False),
+        'search': models.SearchParams(
+            hnsw_ef=128,
+            quantization=models.QuantizationSearchParams(rescore=True, oversampling=1.5)
+        ),
+        'bytes_per_dim': 1.0,
+    },
+    'binary': {
+        'on_disk': True,
+        'quantization': models.BinaryQuantization(
+            binary=models.BinaryQuantizationConfig(always_ram=True)
+        ),
+        'hnsw': models.HnswConfigDiff(m=16, ef_construct=100, on_disk=False),
+        'search': models.SearchParams(
+            hnsw_ef=128,
+            quantization=models.QuantizationSearchParams(rescore=True, oversampling=3.0)
+        ),
+        'bytes_per_dim': 1.0 / 8,
+    },
+}
+
+DEFAULT_PROFILE = 'memory'
+
+
+def create_collection_with_profile(client, collection_name: str, size: int, profile: str = DEFAULT_PROFILE,
+                                   distance=models.Distance.COSINE, **kwargs):
+    """Create a collection using the vector, quantization and HNSW settings of ``profile``."""
+    settings = STORAGE_PROFILES[profile]
+    client.create_collection(
+        collection_name=collection_name,
+        vectors_config=models.VectorParams(size=size, distance=distance, on_disk=settings['on_disk']),
+        quantization_config=settings['quantization'],
+        hnsw_config=settings['hnsw'],
+        **kwargs
+    )
+
+
+def apply_profile(client, collection_name: str, profile: str):
+    """Switch an existing collection to ``profile``; Qdrant rebuilds in the background."""
+    settings = STORAGE_PROFILES[profile]
+    client.update_collection(
+        collection_name=collection_name,
+        vectors_config={'': models.VectorParamsDiff(on_disk=settings['on_disk'])},
+        quantization_config=settings['quantization'] or models.Disabled.DISABLED,
+        hnsw_config=settings['hnsw'],
+    )
+
+
+def search_params(profile: str) -> models.SearchParams:
+    """Search parameters to use with a collection built from ``profile``."""
+    return STORAGE_PROFILES[profile]['search']
+
+
+def estimated_ram_bytes(profile: str, count: int, size: int) -> int:
+    """RAM held by the vectors Qdrant keeps in memory for this profile (graph excluded)."""
+    return int(count * size * STORAGE_PROFILES[profile]['bytes_per_dim'])
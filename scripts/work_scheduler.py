@@ -0,0 +1,151 @@
+"""
+Skew-aware scheduling of users across pipeline workers.
+
+Comment counts are long-tailed, so handing users to workers in ranking
+order leaves most workers idle while one works through the biggest history.
+Each user is given a cost estimated from their comment count and text
+length. Users above ``max_task_cost`` are split into ranges of whole
+comments, and all tasks are queued largest first (LPT order), so the run
+takes roughly total cost / workers instead of being gated by a single user.
+The chunk results of a split user are merged back into one result with
+marker offsets rebased onto the merged text.
+"""
+
+from typing import Dict, List, Optional
+
+from comment_sources import COMMENT_SEPARATOR
+
+# Fixed cost of a comment in characters, on top of its length
+COMMENT_OVERHEAD_CHARS = 200
+
+# Never split below this many characters; tiny chunks only add overhead
+MIN_SPLIT_CHARS = 50_000
+
+# Aim for this many tasks per worker when choosing the split size
+TASKS_PER_WORKER = 4
+
+
+def estimate_cost(comment_count: int, text_length: int) -> int:
+    """Relative cost of normalising and tagging a user's comments."""
+    return text_length + COMMENT_OVERHEAD_CHARS * (comment_count or 0)
+
+
+def split_comments(text: str, max_cost: int) -> List[str]:
+    """Split concatenated comments into chunks of whole comments costing about ``max_cost``."""
+    chunks = []
+    current = []
+    current_cost = 0
+    for comment in text.split(COMMENT_SEPARATOR):
+        cost = estimate_cost(1, len(comment))
+        if current and current_cost + cost > max_cost:
+            chunks.append(COMMENT_SEPARATOR.join(current))
+            current, current_cost = [], 0
+        current.append(comment)
+        current_cost += cost
+    if current:
+        chunks.append(COMMENT_SEPARATOR.join(current))
+    return chunks
+
+
+def plan_tasks(user_rows: List[Dict[str, any]], workers: int,
+               max_task_cost: Optional[int] = None) -> List[Dict[str, any]]:
+    """
+    Turn user rows into tasks sorted largest first.
+
+    Each task is {username, chunk, chunks, text, cost}; ``chunk`` is the
+    position of the comment range within the user and ``chunks`` how many
+    ranges the user was split into.
+    """
+    costs = [
+        estimate_cost(row.get('comment_count') or 0, len(row['all_comments'] or ''))
+        for row in user_rows
+    ]
+    if max_task_cost is None:
+        max_task_cost = max(MIN_SPLIT_CHARS, sum(costs) // max(1, workers * TASKS_PER_WORKER))
+
+    tasks = []
+    for row, cost in zip(user_rows, costs):
+        text = row['all_comments'] or ''
+        chunks = split_comments(text, max_task_cost) if cost > max_task_cost else [text]
+        for index, chunk in enumerate(chunks):
+            tasks.append({
+                'username': row['username'],
+                'chunk': index,
+                'chunks': len(chunks),
+                'text': chunk,
+                'cost': estimate_cost(chunk.count(COMMENT_SEPARATOR) + 1, len(chunk)),
+            })
+    tasks.sort(key=lambda task: task['cost'], reverse=True)
+    return tasks
+
+
+def merge_results(username: str, chunk_results: List[Dict[str, any]]) -> Dict[str, any]:
+    """
+    Merge per-chunk results (in chunk order) into one user result.
+
+    Marker offsets are shifted onto the chunks' anonymized texts joined by
+    COMMENT_SEPARATOR, the same layout an unsplit run produces.
+    """
+    if len(chunk_results) == 1:
+        return chunk_results[0]
+
+    sentences, sentence_lemmas, lemmatized, anonymized, markers = [], [], [], [], []
+    token_count = 0
+    offset = 0
+    for result in chunk_results:
+        normalized = result['normalized']
+        sentences.extend(normalized['sentences'])
+        sentence_lemmas.extend(normalized['sentence_lemmas'])
+        if normalized['lemmatized_text']:
+            lemmatized.append(normalized['lemmatized_text'])
+        anonymized.append(normalized['anonymized_text'])
+        token_count += normalized['token_count']
+
+        for marker in result['temporal_markers']:
+            markers.append({
+                **marker,
+                'start_char': marker['start_char'] + offset,
+                'end_char': marker['end_char'] + offset,
+            })
+        offset += len(normalized['anonymized_text']) + len(COMMENT_SEPARATOR)
+
+    return {
+        'username': username,
+        'normalized': {
+            'sentences': sentences,
+            'sentence_lemmas': sentence_lemmas,
+            'lemmatized_text': ' '.join(lemmatized),
+            'anonymized_text': COMMENT_SEPARATOR.join(anonymized),
+            'token_count': token_count,
+        },
+        'temporal_markers': markers,
+        'temporal_sentence_count': sum(result['temporal_sentence_count'] for result in chunk_results),
+        'total_sentences': len(sentences),
+    }
+
+
+class WorkerStats:
+    """Busy time and task counts per worker process, for a utilisation report."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.busy: Dict[int, float] = {}
+        self.tasks: Dict[int, int] = {}
+        self.costs: Dict[int, int] = {}
+
+    def record(self, pid: int, seconds: float, cost: int):
+        self.busy[pid] = self.busy.get(pid, 0.0) + seconds
+        self.tasks[pid] = self.tasks.get(pid, 0) + 1
+        self.costs[pid] = self.costs.get(pid, 0) + cost
+
+    def report(self, wall_seconds: float):
+        if not self.busy or wall_seconds <= 0:
+            return
+        total_busy = sum(self.busy.values())
+        print(f"\n⚙️  Worker utilisation ({wall_seconds:.1f}s wall, "
+              f"ideal {total_busy / self.workers:.1f}s for {self.workers} workers):")
+        print(f"  {'worker':>8} {'tasks':>6} {'cost':>12} {'busy s':>8} {'util':>6}")
+        for pid in sorted(self.busy):
+            print(f"  {pid:>8} {self.tasks[pid]:>6} {self.costs[pid]:>12} "
+                  f"{self.busy[pid]:>8.1f} {self.busy[pid] / wall_seconds * 100:>5.0f}%")
+        print(f"  Mean utilisation: {total_busy / (wall_seconds * self.workers) * 100:.0f}%")